@@ -0,0 +1,62 @@
+# Benchmark harness for the project scripts.
+#
+# startup: for each task entry point, time a fresh interpreter that imports the task module
+# (no pipeline work runs on import) and report which heavy dependencies the import pulled in.
+# The best of --repeat runs is reported, since the first run also warms the filesystem cache.
+#
+# Usage: python IGDAL_PROJECT_BENCH.py startup --repeat 5
+
+import argparse
+import subprocess
+import sys
+import time
+
+TASKS = [
+    'IGDAL_PROJECT_TASK1_MAKEFERC',
+    'IGDAL_PROJECT_TASK2_MERGEWITHHIFLD',
+    'IGDAL_PROJECT_TASK3_ROUGHANALYSIS',
+    'IGDAL_PROJECT_TASK4_MACHINELEARNING',
+]
+
+HEAVY_MODULES = ['geopandas', 'matplotlib', 'seaborn', 'sklearn', 'scipy', 'censusdata']
+
+PROBE = (
+    'import sys, {module}; '
+    'print(",".join(m for m in {heavy!r} if m in sys.modules))'
+)
+
+
+def time_import(module):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, result.stdout.strip()
+
+
+def bench_startup(repeat):
+    print(f"{'task':<40}{'best (s)':>10}  heavy modules loaded on import")
+    for module in TASKS:
+        timings = []
+        loaded = ''
+        for _ in range(repeat):
+            elapsed, loaded = time_import(module)
+            timings.append(elapsed)
+        print(f'{module:<40}{min(timings):>10.3f}  {loaded or "-"}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark harness for the project scripts.')
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+    startup = subparsers.add_parser('startup', help='time importing each task entry point')
+    startup.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.bench == 'startup':
+        bench_startup(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
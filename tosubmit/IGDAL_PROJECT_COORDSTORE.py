@@ -0,0 +1,130 @@
+# Memory-mapped coordinate store for transmission line geometries.
+#
+# Instead of one Shapely object per line, a store keeps every line's vertices in flat float64
+# arrays on disk, with offset arrays marking where each part and each line starts (the same
+# layout as GeoArrow / shapely.to_ragged_array for MultiLineStrings):
+#
+#   coords.npy        (n_vertices, 2) float64   x, y of every vertex
+#   part_offsets.npy  (n_parts + 1,)  int64     vertex offset of every LineString part
+#   geom_offsets.npy  (n_lines + 1,)  int64     part offset of every line
+#   attributes.pkl    line attributes without geometry
+#   meta.json         CRS
+#
+# The arrays are opened with np.load(mmap_mode='r'), so only the pages a kernel touches are
+# read into memory. Lengths, bounding boxes and endpoints run as NumPy kernels directly on the
+# arrays; Shapely objects are only built on demand for selected lines (see
+# IGDAL_PROJECT_INTERFACES.apportion_store, which only builds those whose bounding box is not
+# inside a region).
+
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+
+def write_store(gdf, path):
+    """
+    Write a GeoDataFrame of (Multi)LineStrings to a coordinate store directory.
+    """
+    os.makedirs(path, exist_ok=True)
+    geoms = gdf.geometry.values
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    coords, coord_part = shapely.get_coordinates(parts, return_index=True)
+
+    part_offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(coord_part, minlength=len(parts)), out=part_offsets[1:])
+    geom_offsets = np.zeros(len(geoms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(part_geom, minlength=len(geoms)), out=geom_offsets[1:])
+
+    np.save(os.path.join(path, 'coords.npy'), coords.astype(np.float64))
+    np.save(os.path.join(path, 'part_offsets.npy'), part_offsets)
+    np.save(os.path.join(path, 'geom_offsets.npy'), geom_offsets)
+    pd.DataFrame(gdf.drop(columns=gdf.geometry.name)).to_pickle(os.path.join(path, 'attributes.pkl'))
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'crs': gdf.crs.to_string() if gdf.crs is not None else None}, f)
+
+
+class CoordStore:
+    """
+    Read-only, memory-mapped view of a coordinate store written by write_store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.coords = np.load(os.path.join(path, 'coords.npy'), mmap_mode='r')
+        self.part_offsets = np.load(os.path.join(path, 'part_offsets.npy'), mmap_mode='r')
+        self.geom_offsets = np.load(os.path.join(path, 'geom_offsets.npy'), mmap_mode='r')
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.crs = json.load(f)['crs']
+        self._attributes = None
+
+    def __len__(self):
+        return len(self.geom_offsets) - 1
+
+    @property
+    def attributes(self):
+        if self._attributes is None:
+            self._attributes = pd.read_pickle(os.path.join(self.path, 'attributes.pkl'))
+        return self._attributes
+
+    def _vertex_geom(self):
+        # Line index of every vertex
+        vertex_part = np.repeat(np.arange(len(self.part_offsets) - 1), np.diff(self.part_offsets))
+        part_geom = np.repeat(np.arange(len(self)), np.diff(self.geom_offsets))
+        return part_geom[vertex_part]
+
+    def lengths(self):
+        """
+        Planar length of every line (sum of its parts' segment lengths), in CRS units.
+        """
+        segment_lengths = np.hypot(*np.diff(self.coords, axis=0).T)
+        # A segment joining the last vertex of one part to the first of the next is not real
+        part_starts = np.asarray(self.part_offsets[1:-1])
+        valid = np.ones(len(segment_lengths), dtype=bool)
+        valid[part_starts[part_starts > 0] - 1] = False
+        segment_geom = self._vertex_geom()[:-1]
+        return np.bincount(segment_geom[valid], weights=segment_lengths[valid], minlength=len(self))
+
+    def bounds(self):
+        """
+        (n_lines, 4) array of minx, miny, maxx, maxy; NaN for empty lines.
+        """
+        vertex_offsets = np.asarray(self.part_offsets)[np.asarray(self.geom_offsets)]
+        starts, stops = vertex_offsets[:-1], vertex_offsets[1:]
+        out = np.full((len(self), 4), np.nan)
+        nonempty = stops > starts
+        if nonempty.any():
+            idx = starts[nonempty]
+            out[nonempty, :2] = np.minimum.reduceat(self.coords, idx, axis=0)
+            out[nonempty, 2:] = np.maximum.reduceat(self.coords, idx, axis=0)
+        return out
+
+    def endpoints(self):
+        """
+        First and last vertex of every non-empty line, as two (n_lines, 2) arrays.
+        """
+        vertex_offsets = np.asarray(self.part_offsets)[np.asarray(self.geom_offsets)]
+        nonempty = vertex_offsets[1:] > vertex_offsets[:-1]
+        first = np.full((len(self), 2), np.nan)
+        last = np.full((len(self), 2), np.nan)
+        first[nonempty] = self.coords[vertex_offsets[:-1][nonempty]]
+        last[nonempty] = self.coords[vertex_offsets[1:][nonempty] - 1]
+        return first, last
+
+    def geometries(self, indices=None):
+        """
+        Build Shapely MultiLineStrings on demand, for all lines or only the given indices.
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        geoms = []
+        for i in indices:
+            parts = [
+                np.asarray(self.coords[self.part_offsets[p]:self.part_offsets[p + 1]])
+                for p in range(self.geom_offsets[i], self.geom_offsets[i + 1])
+            ]
+            geoms.append(shapely.MultiLineString(parts) if parts else shapely.MultiLineString())
+        return gpd.GeoSeries(geoms, index=indices, crs=self.crs)
+
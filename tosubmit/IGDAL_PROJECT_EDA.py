@@ -0,0 +1,347 @@
+# Fast exploratory statistics for TASK3 (`--fast-eda`).
+#
+# profile_columns makes one chunked pass over the rows and updates a summary for every column
+# of interest at once, instead of calling value_counts / describe per column and fitting a
+# KDE on every row:
+#
+#   numeric columns      count, mean and std (merged per chunk), exact min / max, quantiles
+#                        from a streaming quantile sketch, a fixed-bin histogram and a uniform
+#                        reservoir sample
+#   other columns        category counts and the number of missing values
+#
+# KDE and ECDF plots are drawn from the reservoir sample, so their cost depends on the sample
+# size, not on the region size. Every summary reports its error bound:
+#
+#   quantiles   the sketch tracks a deterministic bound on the rank error of any quantile
+#   ECDF        Dvoretzky-Kiefer-Wolfowitz band: with probability 1 - alpha the sample ECDF is
+#               within sqrt(ln(2 / alpha) / (2 m)) of the full-data ECDF (m = sample size)
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch (a KLL-style stack of compactors).
+    Items at level h stand for 2**h input values. When a level holds more than k items it is
+    sorted and every other item is promoted to the next level, which changes the rank of any
+    value by at most 2**h; the sum over all compactions is kept in rank_error.
+    """
+
+    def __init__(self, k=256, rng=None):
+        self.k = k
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.rank_error = 0
+
+    def update(self, values):
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self.k:
+                self._compact(h)
+            h += 1
+
+    def _compact(self, h):
+        items = np.sort(self.levels[h])
+        # An odd item out stays on this level so the total weight is unchanged
+        carry = items[len(items) - len(items) % 2:]
+        items = items[:len(items) - len(items) % 2]
+        promoted = items[self.rng.integers(2)::2]
+        self.levels[h] = carry
+        if h + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+        self.rank_error += 2 ** h
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side='left')
+        return items[order][np.clip(idx, 0, len(items) - 1)]
+
+    def epsilon(self):
+        """
+        Bound on the rank error of any quantile, as a fraction of the count.
+        """
+        return self.rank_error / self.n if self.n else 0.0
+
+
+class StreamingHistogram:
+    """
+    Histogram with a fixed number of equal-width bins. The range is set by the first values.
+    When later values fall outside it, the grid is moved by whole bins toward them and, only
+    if the data no longer fits, the bin width is doubled (merging adjacent bins) until it does.
+    Counts are never re-binned from the data, and the occupied bins always span more than
+    half the range.
+    """
+
+    def __init__(self, bins=30):
+        self.bins = bins
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.lo = None
+        self.width = None
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        vmin, vmax = values.min(), values.max()
+        if self.lo is None:
+            self.lo = vmin
+            self.width = (vmax - vmin) / self.bins if vmax > vmin else 1.0
+        if vmin < self.lo or vmax > self.lo + self.bins * self.width:
+            self._regrid(vmin, vmax)
+        idx = np.clip(((values - self.lo) // self.width).astype(np.int64), 0, self.bins - 1)
+        self.counts += np.bincount(idx, minlength=self.bins)
+
+    def _regrid(self, vmin, vmax):
+        occupied = np.flatnonzero(self.counts)
+        if len(occupied):
+            vmin = min(vmin, self.lo + occupied[0] * self.width)
+            vmax = max(vmax, self.lo + (occupied[-1] + 1) * self.width)
+        # New grid starts on an old bin edge, so every old bin falls inside one new bin
+        shift = int(np.floor((vmin - self.lo) / self.width))
+        factor = 1
+        while vmax > self.lo + (shift + self.bins * factor) * self.width:
+            factor *= 2
+        new_idx = (occupied - shift) // factor
+        self.counts = np.bincount(new_idx, weights=self.counts[occupied], minlength=self.bins).astype(np.int64)
+        self.lo += shift * self.width
+        self.width *= factor
+
+    def edges(self):
+        return self.lo + self.width * np.arange(self.bins + 1)
+
+
+class Reservoir:
+    """
+    Uniform sample without replacement of at most `size` values: every value gets a random key
+    and the `size` smallest keys are kept, which can be updated a whole chunk at a time.
+    """
+
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.values = np.empty(0)
+        self.keys = np.empty(0)
+
+    def update(self, values):
+        self.values = np.concatenate([self.values, values])
+        self.keys = np.concatenate([self.keys, self.rng.random(len(values))])
+        if len(self.values) > self.size:
+            keep = np.argpartition(self.keys, self.size)[:self.size]
+            self.values, self.keys = self.values[keep], self.keys[keep]
+
+
+def dkw_epsilon(sample_size, alpha=0.05):
+    """
+    Half-width of the DKW confidence band of an ECDF from sample_size values.
+    """
+    return float(np.sqrt(np.log(2 / alpha) / (2 * sample_size))) if sample_size else np.nan
+
+
+class NumericProfile:
+    kind = 'numeric'
+
+    def __init__(self, bins, sketch_k, sample_size, rng):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(sketch_k, rng)
+        self.histogram = StreamingHistogram(bins)
+        self.reservoir = Reservoir(sample_size, rng)
+
+    def update(self, chunk):
+        values = pd.to_numeric(chunk, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        finite = np.isfinite(values)
+        self.missing += int((~finite).sum())
+        values = values[finite]
+        if len(values) == 0:
+            return
+        # Merge the chunk's mean and sum of squared deviations into the running ones (Chan et al.)
+        n, chunk_mean = len(values), values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+        delta = chunk_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.sketch.update(values)
+        self.histogram.update(values)
+        self.reservoir.update(values)
+
+    @property
+    def sample(self):
+        return self.reservoir.values
+
+    def summary(self):
+        quartiles = self.sketch.quantiles([0.25, 0.5, 0.75]) if self.count else [np.nan] * 3
+        return pd.Series({
+            'count': self.count,
+            'missing': self.missing,
+            'mean': self.mean if self.count else np.nan,
+            'std': np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+            'min': self.min if self.count else np.nan,
+            '25%': quartiles[0],
+            '50%': quartiles[1],
+            '75%': quartiles[2],
+            'max': self.max if self.count else np.nan,
+        })
+
+    def error_bounds(self, alpha=0.05):
+        sample_size = len(self.sample)
+        return {
+            'quantile_rank_error': self.sketch.epsilon(),
+            'sample_size': sample_size,
+            # The sample is the whole column when it fits, and then the ECDF is exact
+            'ecdf_error': 0.0 if sample_size == self.count else dkw_epsilon(sample_size, alpha),
+            'alpha': alpha,
+        }
+
+
+class CategoricalProfile:
+    kind = 'categorical'
+
+    def __init__(self):
+        self.counts = {}
+        self.missing = 0
+
+    def update(self, chunk):
+        self.missing += int(chunk.isna().sum())
+        for value, count in chunk.dropna().value_counts().items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+
+    def value_counts(self):
+        return pd.Series(self.counts, dtype='int64').sort_values(ascending=False)
+
+    def summary(self):
+        counts = self.value_counts()
+        return pd.Series({
+            'count': int(counts.sum()),
+            'missing': self.missing,
+            'unique': len(counts),
+            'top': counts.index[0] if len(counts) else np.nan,
+            'freq': int(counts.iloc[0]) if len(counts) else 0,
+        })
+
+
+def profile_columns(df, columns, sample_size=2000, bins=30, sketch_k=256, chunk_size=100_000, seed=0):
+    """
+    Profile every column of interest that is in df, in one chunked pass over the rows.
+    """
+    rng = np.random.default_rng(seed)
+    profiles = {}
+    for column in columns:
+        if column not in df.columns:
+            continue
+        if pd.api.types.is_numeric_dtype(df[column]):
+            profiles[column] = NumericProfile(bins, sketch_k, sample_size, rng)
+        else:
+            profiles[column] = CategoricalProfile()
+
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        for column, profile in profiles.items():
+            profile.update(chunk[column])
+
+    for column, profile in profiles.items():
+        if profile.kind == 'numeric' and profile.histogram.counts.sum() != profile.count:
+            raise RuntimeError(f'{column}: histogram holds {profile.histogram.counts.sum()} of {profile.count} values')
+    return profiles
+
+
+def print_profile(profile):
+    print(profile.summary())
+    if profile.kind == 'categorical':
+        print("Value Counts:")
+        print(profile.value_counts())
+        return
+    print("Histogram:")
+    counts, edges = profile.histogram.counts, profile.histogram.edges()
+    # Leave out the empty bins at either end of the range
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero):
+        first, last = nonzero[0], nonzero[-1] + 1
+        print(pd.Series(counts[first:last], index=pd.IntervalIndex.from_breaks(np.round(edges[first:last + 1], 3), closed='left')))
+    bounds = profile.error_bounds()
+    print(f"Quantiles within {bounds['quantile_rank_error']:.2%} in rank; "
+          f"KDE/ECDF from {bounds['sample_size']} of {profile.count} values, "
+          f"ECDF within {bounds['ecdf_error']:.3f} ({1 - bounds['alpha']:.0%} DKW band)")
+
+
+def plot_profile(profile, column, region_name):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if profile.kind == 'categorical':
+        counts = profile.value_counts()
+        plt.figure(figsize=(10, 6))
+        plt.barh(counts.index.astype(str), counts.to_numpy())
+        plt.gca().invert_yaxis()
+        plt.title(f'{column} Count - {region_name}')
+        plt.show()
+
+        plt.figure(figsize=(6, 6))
+        counts.plot.pie(autopct='%1.1f%%')
+        plt.title(f'{column} Pie - {region_name}')
+        plt.ylabel('')
+        plt.show()
+        return
+
+    if profile.count == 0:
+        return
+    sample = profile.sample
+    bounds = profile.error_bounds()
+    summary = profile.summary()
+    label = f"sample of {bounds['sample_size']}"
+
+    # Hist (full data) with a KDE from the sample & boxplot from the sketch quartiles
+    plt.figure(figsize=(14, 6))
+    plt.subplot(1, 2, 1)
+    histogram = profile.histogram
+    plt.stairs(histogram.counts / (profile.count * histogram.width), histogram.edges(), fill=True, alpha=0.5)
+    if len(np.unique(sample)) > 1:
+        sns.kdeplot(x=sample)
+    plt.ylabel('Density')
+    plt.title(f'{column} Distribution - {region_name}')
+
+    plt.subplot(1, 2, 2)
+    iqr = summary['75%'] - summary['25%']
+    plt.gca().bxp([{
+        'med': summary['50%'], 'q1': summary['25%'], 'q3': summary['75%'],
+        'whislo': max(summary['min'], summary['25%'] - 1.5 * iqr),
+        'whishi': min(summary['max'], summary['75%'] + 1.5 * iqr),
+        # Outliers are drawn from the sample, the box and whiskers from the full column
+        'fliers': sample[(sample < summary['25%'] - 1.5 * iqr) | (sample > summary['75%'] + 1.5 * iqr)],
+    }], vert=False)
+    plt.title(f'{column} Boxplot - {region_name}')
+    plt.show()
+
+    # KDE
+    if len(np.unique(sample)) > 1:
+        plt.figure(figsize=(7, 4))
+        sns.kdeplot(x=sample, fill=True)
+        plt.title(f'{column} KDE ({label}) - {region_name}')
+        plt.show()
+
+    # CDF with its DKW band
+    plt.figure(figsize=(7, 4))
+    xs = np.sort(sample)
+    ecdf = np.arange(1, len(xs) + 1) / len(xs)
+    plt.step(xs, ecdf, where='post')
+    plt.fill_between(xs, np.clip(ecdf - bounds['ecdf_error'], 0, 1), np.clip(ecdf + bounds['ecdf_error'], 0, 1),
+                     step='post', alpha=0.3)
+    plt.ylabel('Proportion')
+    plt.title(f'{column} CDF ({label}) - {region_name}')
+    plt.show()
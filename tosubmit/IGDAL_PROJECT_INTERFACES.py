@@ -0,0 +1,212 @@
+# This script analyses transmission lines that cross FERC region borders (the "seams").
+# The per-region sjoin in TASK2 puts a border-crossing line into every region it touches, so
+# summing per-region files double-counts its length and capacity. Here every line is paired
+# with the regions it intersects in one bulk spatial-index query, clipped to each region, and
+# its length and capacity are apportioned by the clipped length fraction.
+#
+# Region polygons overlap (ERCOT and SPP share part of Texas, ISO-NE and NYISO a strip along
+# their border), so overlaps are resolved first: every region gives up the area already
+# claimed by the regions listed before it in the registry. A line lying along a shared border
+# is inside both closed polygons, so each line's fractions are also scaled to sum to at most 1.
+#
+# Outputs:
+#   data/interface_region_totals.csv    clipped line length and capacity per region
+#   data/interface_transfer_matrix.csv  region x region capacity of lines crossing between them
+#   data/interface_lines.geojson        the border-crossing lines and the regions they connect
+#
+# Usage: python IGDAL_PROJECT_INTERFACES.py   (after TASK3)
+
+import argparse
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from IGDAL_PROJECT_REGIONS import load_registry, geometry_path, processed_path
+
+
+def clip_fractions(line_geoms, region_geoms):
+    """
+    Fraction of each line's length inside the paired region geometry (vectorized, broadcasts).
+    """
+    full_length = shapely.length(line_geoms)
+    clipped_length = shapely.length(shapely.intersection(line_geoms, region_geoms))
+    return np.divide(clipped_length, full_length, out=np.zeros_like(full_length), where=full_length > 0)
+
+
+def resolve_overlaps(regions):
+    """
+    Remove from every region the area claimed by the regions before it, so no two overlap.
+    """
+    resolved = []
+    claimed = None
+    for geom in regions.geometry.values:
+        resolved.append(geom if claimed is None else shapely.difference(geom, claimed))
+        claimed = geom if claimed is None else shapely.union(claimed, geom)
+    return regions.set_geometry(gpd.GeoSeries(resolved, index=regions.index, crs=regions.crs))
+
+
+def region_frame(region_geometries):
+    """
+    One row per region (REGION, geometry) in EPSG:3857 with overlaps resolved, from a
+    {region key: GeoDataFrame} dict in registry order.
+    """
+    keys = list(region_geometries.keys())
+    geoms = [region_geometries[key].to_crs(epsg=3857).unary_union for key in keys]
+    return resolve_overlaps(gpd.GeoDataFrame({'REGION': keys}, geometry=geoms, crs='EPSG:3857'))
+
+
+def _apportion(line_bounds, line_geometries, regions):
+    """
+    Core of apportion. line_geometries(indices) returns the Shapely geometries of the given
+    lines; it is not called for lines whose bounding box is already inside a region.
+    """
+    region_geoms = regions.geometry.values
+    shapely.prepare(region_geoms)
+    valid = np.flatnonzero(~np.isnan(line_bounds).any(axis=1))
+    boxes = shapely.box(*line_bounds[valid].T)
+    box_pos, region_pos = regions.sindex.query(boxes)
+    line_pos = valid[box_pos]
+
+    # Nearly every line lies inside one region: prepared containment tests settle those, and
+    # only lines crossing a region border are intersected with it
+    fraction = np.zeros(len(line_pos))
+    inside = shapely.contains_properly(region_geoms[region_pos], boxes[box_pos])
+    fraction[inside] = 1.0
+    rest = np.flatnonzero(~inside)
+    if len(rest):
+        needed, inverse = np.unique(line_pos[rest], return_inverse=True)
+        geoms = np.asarray(line_geometries(needed))[inverse]
+        pair_regions = region_geoms[region_pos[rest]]
+        inside = shapely.contains_properly(pair_regions, geoms)
+        border = ~inside & shapely.intersects(pair_regions, geoms)
+        fraction[rest[inside]] = 1.0
+        fraction[rest[border]] = clip_fractions(geoms[border], pair_regions[border])
+
+    total = np.bincount(line_pos, weights=fraction, minlength=len(line_bounds))
+    fraction = fraction / np.maximum(total[line_pos], 1)
+    # Lines that only touch a region have no length inside it
+    keep = fraction > 0
+    return line_pos[keep], region_pos[keep], fraction[keep]
+
+
+def apportion(line_geoms, regions):
+    """
+    Positions of every intersecting (line, region) pair and the share of the line's length
+    in that region. Shares are scaled down where they sum to more than 1.
+    """
+    return _apportion(shapely.bounds(line_geoms), lambda indices: line_geoms[indices], regions)
+
+
+def apportion_store(store, regions):
+    """
+    apportion for the lines of an IGDAL_PROJECT_COORDSTORE store. Bounding boxes come from the
+    store's NumPy kernel; Shapely geometries are built only for lines whose box is not inside
+    a region.
+    """
+    return _apportion(store.bounds(), lambda indices: store.geometries(indices).values, regions.to_crs(store.crs))
+
+
+def share_matrix(line_pos, region_pos, fraction, n_lines, regions):
+    """
+    Dense (lines x regions) array of the shares returned by apportion.
+    """
+    shares = np.zeros((n_lines, len(regions)))
+    shares[line_pos, region_pos] = fraction
+    return shares
+
+
+def load_lines(registry):
+    # Each crossing line appears in several processed files; keep one copy per ID
+    frames = [gpd.read_file(processed_path(region)) for region in registry]
+    lines = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=frames[0].crs)
+    lines = lines.drop_duplicates(subset='ID').reset_index(drop=True)
+    return lines.to_crs(epsg=3857)
+
+
+def load_region_geometries(registry):
+    return region_frame({region['key']: gpd.read_file(geometry_path(region)) for region in registry})
+
+
+def line_region_pairs(lines, regions):
+    """
+    Every (line, region) pair with the line's apportioned share of length and capacity.
+    INTERIOR marks pairs where the line runs through the region rather than along its border.
+    """
+    line_geoms = lines.geometry.values
+    line_pos, region_pos, fraction = apportion(line_geoms, regions)
+    pairs = pd.DataFrame({
+        'LINE': line_pos,
+        'REGION': regions['REGION'].to_numpy()[region_pos],
+        'FRACTION': fraction
+    })
+    pairs['LINE_LENGTH_MILES'] = lines['LINE_LENGTH_MILES'].to_numpy()[line_pos] * fraction
+    pairs['POWER_CAPACITY'] = lines['POWER_CAPACITY'].to_numpy()[line_pos] * fraction
+
+    # Only lines in several regions can cross a border; check which of their pieces have
+    # length off the region boundary
+    pairs['INTERIOR'] = True
+    shared = pairs.duplicated('LINE', keep=False).to_numpy()
+    region_geoms = regions.geometry.values[region_pos[shared]]
+    pieces = shapely.intersection(line_geoms[line_pos[shared]], region_geoms)
+    off_border = shapely.length(shapely.difference(pieces, shapely.boundary(region_geoms)))
+    pairs.loc[shared, 'INTERIOR'] = off_border > 0
+    return pairs
+
+
+def transfer_matrix(lines, pairs, regions, tolerance=1.0):
+    """
+    Region x region capacity of the lines that cross directly between each pair of regions.
+    A line running A -> B -> C is a crossing for A-B and B-C but not A-C: two regions count
+    as crossed only when the line's pieces inside them meet (within tolerance metres).
+    """
+    region_keys = list(regions['REGION'])
+    interior = pairs[pairs['INTERIOR']]
+    crossing = interior[interior.duplicated('LINE', keep=False)]
+    links = crossing.merge(crossing, on='LINE', suffixes=('_FROM', '_TO'))
+    links = links[links['REGION_FROM'] != links['REGION_TO']]
+
+    line_geoms = lines.geometry.values[links['LINE'].to_numpy()]
+    region_geoms = regions.set_index('REGION').geometry
+    piece_from = shapely.intersection(line_geoms, region_geoms.loc[links['REGION_FROM']].values)
+    piece_to = shapely.intersection(line_geoms, region_geoms.loc[links['REGION_TO']].values)
+    links = links[shapely.dwithin(piece_from, piece_to, tolerance)].copy()
+
+    links['POWER_CAPACITY'] = lines['POWER_CAPACITY'].to_numpy()[links['LINE']]
+    matrix = links.pivot_table(index='REGION_FROM', columns='REGION_TO', values='POWER_CAPACITY', aggfunc='sum')
+    return matrix.reindex(index=region_keys, columns=region_keys).fillna(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inter-regional interface analysis of border-crossing lines.')
+    parser.parse_args(argv)
+
+    registry = load_registry()
+    region_keys = [region['key'] for region in registry]
+    lines = load_lines(registry)
+    regions = load_region_geometries(registry)
+    pairs = line_region_pairs(lines, regions)
+
+    region_totals = pairs.groupby('REGION')[['LINE_LENGTH_MILES', 'POWER_CAPACITY']].sum().reindex(region_keys).fillna(0)
+    # Lines shared by several regions count fractionally, so the column sums to the line count
+    region_counts = pairs.groupby('REGION')['FRACTION'].sum().reindex(region_keys).fillna(0)
+    region_totals.insert(0, 'LINES', region_counts)
+    print(region_totals)
+    region_totals.to_csv('data/interface_region_totals.csv', index_label='REGION')
+
+    matrix = transfer_matrix(lines, pairs, regions)
+    print(matrix)
+    matrix.to_csv('data/interface_transfer_matrix.csv', index_label='REGION')
+
+    interior = pairs[pairs['INTERIOR']]
+    line_regions = interior.groupby('LINE')['REGION'].agg(lambda r: ', '.join(sorted(r)))
+    line_regions = line_regions[interior.groupby('LINE').size() > 1]
+    interface_lines = lines.iloc[line_regions.index].copy()
+    interface_lines['REGIONS'] = line_regions.to_numpy()
+    print(f'{len(interface_lines)} of {len(lines)} lines cross a region border')
+    interface_lines.to_crs(epsg=4326).to_file('data/interface_lines.geojson', driver='GeoJSON')
+
+
+if __name__ == '__main__':
+    main()
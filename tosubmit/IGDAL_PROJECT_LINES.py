@@ -0,0 +1,273 @@
+# Shared transmission line helpers used by TASK3, the partitioned execution mode and the snapshot store.
+# Keeping them in one place guarantees that both paths compute lengths, capacities
+# and merged lines in exactly the same way.
+
+import geopandas as gpd
+import pandas as pd
+import numpy as np
+from shapely.ops import linemerge, unary_union
+from shapely.geometry import LineString, MultiLineString, GeometryCollection
+from IGDAL_PROJECT_REGIONS import merged_path, coordstore_path
+from IGDAL_PROJECT_COORDSTORE import write_store
+
+# HIFLD columns that are not needed downstream of TASK2
+HIFLD_DROP_COLUMNS = [
+    'NAICS_CODE', 'NAICS_DESC', 'SOURCE', 'VAL_METHOD',
+    'INFERRED', 'SUB_1', 'SUB_2', 'GlobalID'
+]
+
+
+def column_rename(df):
+    df.rename(columns={
+        'SOURCEDATE_left': 'SOURCEDATE_TRANS',
+        'SOURCEDATE_right': 'SOURCEDATE_CA',
+        'VAL_DATE_left': 'VAL_DATE_TRANS',
+        'VAL_DATE_right': 'VAL_DATE_CA',
+        'ID_left': 'ID_TRANS',
+        'OBJECTID_left': 'OBJECTID_TRANS',
+        'OBJECTID_right': 'OBJECTID_CA',
+        'ID_right': 'ID_CA'
+    }, inplace=True)
+    return df
+
+
+def add_year_column(df):
+    df['SOURCEDATE'] = pd.to_datetime(df['SOURCEDATE'])
+    df['YEAR'] = df['SOURCEDATE'].dt.year
+    return df
+
+
+# Line parameters per HIFLD VOLT_CLASS (typical overhead values):
+#   min_kv       lowest nominal voltage of the class, used when VOLT_CLASS is missing
+#   surge_ohm    surge impedance Zc; surge impedance loading is SIL = V^2 / Zc
+#   thermal_amp  conductor (bundle) thermal rating; for DC, the rating of each pole
+LINE_PARAMETERS = pd.DataFrame({
+    'VOLT_CLASS': ['UNDER 100', '100-161', '220-287', '345', '500', '735 AND ABOVE', 'DC'],
+    'min_kv': [0.0, 100.0, 220.0, 300.0, 400.0, 600.0, np.nan],
+    'surge_ohm': [380.0, 380.0, 375.0, 285.0, 250.0, 255.0, np.nan],
+    'thermal_amp': [600.0, 900.0, 1200.0, 2000.0, 3000.0, 4000.0, 2000.0],
+}).set_index('VOLT_CLASS')
+
+LOAD_ANGLE = np.radians(30)  # angle across the line at its stability limit
+PHASE_CONSTANT = 2 * np.pi * 60 / 2.9e5  # rad/km for a 60 Hz overhead line (~0.97 c)
+
+
+def volt_class_codes(voltage, volt_class=None, is_dc=None):
+    """
+    Row of LINE_PARAMETERS for every line: from VOLT_CLASS where it is known, otherwise from
+    the nominal voltage. -1 for lines with neither.
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    ac_classes = LINE_PARAMETERS['min_kv'].dropna()
+    codes = np.searchsorted(ac_classes.to_numpy(), voltage, side='right') - 1
+    codes[~(voltage > 0)] = -1
+    if volt_class is not None:
+        listed = pd.Categorical(volt_class, categories=LINE_PARAMETERS.index).codes
+        codes = np.where(listed >= 0, listed, codes)
+    if is_dc is not None:
+        codes[np.asarray(is_dc, dtype=bool)] = LINE_PARAMETERS.index.get_loc('DC')
+    return codes
+
+
+def line_capacity(voltage, length_km, codes):
+    """
+    Capacity in MW from nominal voltage (kV), length and LINE_PARAMETERS rows, for all lines
+    in one gather. AC lines carry the lower of their thermal limit and the lossless-line
+    stability limit SIL * sin(angle) / sin(beta * length); the latter grows without bound as
+    lines get shorter, so short lines fall back to the thermal limit. DC lines are bipoles
+    rated 2 * V * I with no length limit.
+    """
+    voltage = np.asarray(voltage, dtype=float)
+    length_km = np.asarray(length_km, dtype=float)
+    codes = np.asarray(codes)
+    # Append a row of NaNs so that code -1 gathers NaN parameters
+    surge_ohm = np.append(LINE_PARAMETERS['surge_ohm'].to_numpy(), np.nan)[codes]
+    thermal_amp = np.append(LINE_PARAMETERS['thermal_amp'].to_numpy(), np.nan)[codes]
+    is_dc = codes == LINE_PARAMETERS.index.get_loc('DC')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        thermal = np.sqrt(3) * voltage * thermal_amp / 1000
+        # beta * length past a quarter wavelength would lower sin again; lines are far shorter
+        electrical_length = np.minimum(PHASE_CONSTANT * length_km, np.pi / 2)
+        stability = (voltage ** 2 / surge_ohm) * np.sin(LOAD_ANGLE) / np.sin(electrical_length)
+        capacity = np.fmin(thermal, stability)
+    capacity = np.where(is_dc, 2 * voltage * thermal_amp / 1000, capacity)
+    capacity[~(voltage > 0) | ~(length_km > 0)] = np.nan
+    return capacity
+
+
+def _capacity_inputs(df):
+    voltage = pd.to_numeric(df['VOLTAGE'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    volt_class = df['VOLT_CLASS'].to_numpy() if 'VOLT_CLASS' in df.columns else None
+    is_dc = df['TYPE'].str.contains('DC', na=False).to_numpy() if 'TYPE' in df.columns else None
+    return voltage, volt_class_codes(voltage, volt_class, is_dc)
+
+
+def _assign_capacity(df, length_km, capacity):
+    df['LINE_LENGTH_KM'] = length_km
+    df['LINE_LENGTH_MILES'] = length_km * 0.621371
+    df['POWER_CAPACITY'] = capacity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['LOG_POWER_CAPACITY'] = np.log(np.where(capacity > 0, capacity, np.nan))
+    return df
+
+
+def estimate_power_capacity(df):
+    """
+    Estimate power capacity from line length, voltage and the LINE_PARAMETERS of each line's class.
+    """
+    length_km = df['geometry'].length.to_numpy() / 1000
+    voltage, codes = _capacity_inputs(df)
+    return _assign_capacity(df, length_km, line_capacity(voltage, length_km, codes))
+
+
+def estimate_power_capacity_regions(regions):
+    """
+    estimate_power_capacity for a {region: GeoDataFrame} dict, evaluated over all regions at once.
+    """
+    keys = list(regions.keys())
+    lengths = [regions[key]['geometry'].length.to_numpy() / 1000 for key in keys]
+    inputs = [_capacity_inputs(regions[key]) for key in keys]
+    capacity = line_capacity(
+        np.concatenate([voltage for voltage, _ in inputs]),
+        np.concatenate(lengths),
+        np.concatenate([codes for _, codes in inputs])
+    )
+    splits = np.cumsum([len(length_km) for length_km in lengths])[:-1]
+    for key, length_km, region_capacity in zip(keys, lengths, np.split(capacity, splits)):
+        regions[key] = _assign_capacity(regions[key], length_km, region_capacity)
+    return regions
+
+
+def prepare_region_lines(transmission):
+    """
+    Apply the TASK3 per-region preparation to region-assigned lines: rename join columns,
+    add YEAR, estimate capacity in EPSG:3857 and drop negative voltages. Returns EPSG:4326.
+    """
+    transmission = transmission.to_crs(epsg=3857)
+    column_rename(transmission)
+    if 'index_right' in transmission.columns:
+        transmission.drop(columns=['index_right'], inplace=True)
+    add_year_column(transmission)
+    transmission = estimate_power_capacity(transmission)
+    # Remove lines with negative voltage
+    transmission = transmission[~(transmission['VOLTAGE'] < 0)]
+    return transmission.to_crs(epsg=4326)
+
+
+def merge_lines(transmission_gdf):
+    """
+    Merge lines based on intersection, owner, voltage, and compatible types.
+    """
+    transmission_gdf = transmission_gdf.copy()
+    transmission_gdf['geometry'] = transmission_gdf['geometry'].apply(
+        lambda geom: geom if geom.is_valid else geom.buffer(0)
+    )
+
+    def get_line_type(type_str):
+        if pd.isnull(type_str):
+            return None
+        if 'AC' in type_str:
+            return 'AC'
+        elif 'DC' in type_str:
+            return 'DC'
+        return None
+
+    transmission_gdf['LINE_TYPE'] = transmission_gdf['TYPE'].apply(get_line_type)
+    sindex = transmission_gdf.sindex
+    merged_geometries = []
+    processed_indices = set()
+
+    for idx, line in transmission_gdf.iterrows():
+        if idx in processed_indices:
+            continue
+
+        try:
+            possible_matches_index = list(sindex.intersection(line.geometry.bounds))
+            possible_matches = transmission_gdf.iloc[possible_matches_index]
+            matches = possible_matches[
+                (possible_matches['OWNER'] == line['OWNER']) &
+                (possible_matches['VOLTAGE'] == line['VOLTAGE']) &
+                (possible_matches['LINE_TYPE'] == line['LINE_TYPE'])
+            ]
+            matches = matches[matches.geometry.intersects(line.geometry)]
+            if matches.empty:
+                continue
+
+            match_indices = matches.index.tolist()
+            processed_indices.update(match_indices)
+
+            line_geometries = []
+            for geom in matches.geometry:
+                if geom.geom_type == 'LineString':
+                    line_geometries.append(geom)
+                elif geom.geom_type == 'MultiLineString':
+                    line_geometries.extend(geom.geoms)
+
+            if not line_geometries:
+                continue
+
+            if len(line_geometries) == 1:
+                merged_geom = line_geometries[0]
+            else:
+                united = unary_union(line_geometries)
+                if isinstance(united, (LineString, MultiLineString)):
+                    merged_geom = linemerge(united)
+                elif isinstance(united, GeometryCollection):
+                    lines_in_collection = [g for g in united.geoms if isinstance(g, (LineString, MultiLineString))]
+                    merged_geom = linemerge(MultiLineString(lines_in_collection)) if lines_in_collection else None
+                else:
+                    merged_geom = None
+
+            if merged_geom is None or merged_geom.is_empty:
+                continue
+
+            merged_types = matches['TYPE'].unique()
+            merged_types_str = ', '.join(merged_types)
+            unique_types = set(merged_types)
+            if len(unique_types) == 1:
+                merged_type = unique_types.pop()
+            else:
+                line_type = line['LINE_TYPE']
+                if all(line_type in t for t in merged_types if pd.notnull(t)):
+                    merged_type = line_type
+                else:
+                    continue
+
+            merged_geometries.append({
+                'OWNER': line['OWNER'],
+                'VOLTAGE': line['VOLTAGE'],
+                'TYPE': merged_type,
+                'MERGED_TYPES': merged_types_str,
+                'geometry': merged_geom
+            })
+
+        except Exception as e:
+            print(f"Warning: Could not merge lines OWNER={line['OWNER']}, VOLTAGE={line['VOLTAGE']}: {e}")
+            continue
+
+    # Explicit columns so that a group with nothing to merge still gives a frame with geometry
+    return gpd.GeoDataFrame(
+        merged_geometries, columns=['OWNER', 'VOLTAGE', 'TYPE', 'MERGED_TYPES', 'geometry'],
+        geometry='geometry', crs=transmission_gdf.crs
+    )
+
+
+def finalize_merged_lines(merged_transmission):
+    """
+    Reproject merged lines to EPSG:3857, recompute length and capacity, and return them in EPSG:4326.
+    """
+    merged_transmission.to_crs(epsg=3857, inplace=True)
+    merged_transmission = estimate_power_capacity(merged_transmission)
+    merged_transmission.to_crs(epsg=4326, inplace=True)
+    return merged_transmission
+
+
+def write_merged_lines(merged_transmission, region):
+    """
+    Write a region's merged lines both as GeoJSON and as the coordinate store TASK4 reads,
+    so the two never disagree.
+    """
+    merged_transmission.to_file(merged_path(region), driver='GeoJSON')
+    # Flat coordinate arrays in EPSG:3857 so TASK4 can work without materializing Shapely objects
+    write_store(merged_transmission.to_crs(epsg=3857), coordstore_path(region))
@@ -0,0 +1,199 @@
+# This script is an optional out-of-core replacement for TASK2 and TASK3 (minus the plots).
+# It runs the load -> region assign -> length/capacity -> merge -> summarize chain over
+# spatially partitioned HIFLD data using a local multi-process scheduler, so the full
+# national line set never has to be held in memory at once. No cluster services are needed.
+#
+# Stages:
+#   1. partition: the HIFLD file is parsed once, front to back, by a single streaming reader
+#      that hands row chunks to the workers (GeoJSON has no random access, so per-worker
+#      row slices would each re-parse the file from the start). Workers bucket each line
+#      into a lon/lat grid cell by its representative point and spill the buckets to disk.
+#   2. assign:    one task per grid cell spatially joins the cell's lines to the FERC regions.
+#   3. process:   one task per region gathers its pieces back into the original row order and
+#                 runs the same helpers as TASK3 (capacity estimate, merge_lines), so the
+#                 outputs match the in-memory path.
+#   4. summarize: per-region totals are combined into data/partitioned_summary.csv.
+#
+# Usage: python IGDAL_PROJECT_PARTITIONED.py --workers 4 --chunk-size 20000 --cell-size 5
+
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+import fiona
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from IGDAL_PROJECT_LINES import (
+    HIFLD_DROP_COLUMNS, prepare_region_lines, merge_lines, finalize_merged_lines, write_merged_lines
+)
+from IGDAL_PROJECT_REGIONS import load_registry, region_by_name, geometry_path, processed_path
+
+HIFLD_PATH = 'data/Electric__Power_Transmission_Lines.geojson'
+FERC_PATH = 'data/FERC_1000_Regions.geojson'
+
+# Region geometries, loaded once per worker process by _init_worker
+_REGIONS = None
+
+
+def load_regions():
+    ferc1000 = gpd.read_file(FERC_PATH)
+    ferc1000 = ferc1000[ferc1000['FERC_1000 Regions'].isin(region_by_name(load_registry()))]
+    return ferc1000[['FERC_1000 Regions', 'geometry']]
+
+
+def _init_worker():
+    global _REGIONS
+    _REGIONS = load_regions()
+
+
+def read_chunks(path, chunk_size):
+    """
+    Stream the HIFLD file once, yielding (first row number, GeoDataFrame) chunks of rows.
+    """
+    with fiona.open(path) as src:
+        crs = src.crs
+        features = iter(src)
+        start = 0
+        while True:
+            batch = list(islice(features, chunk_size))
+            if not batch:
+                return
+            yield start, gpd.GeoDataFrame.from_features(batch, crs=crs)
+            start += len(batch)
+
+
+def partition_chunk(start, chunk, crs, cell_size, workdir):
+    """
+    Spill one row chunk of the HIFLD file to disk bucketed by grid cell.
+    """
+    chunk = chunk.to_crs(crs)
+    chunk.drop(columns=HIFLD_DROP_COLUMNS, inplace=True)
+    # Global row number, used to restore the in-memory row order before merging
+    chunk['_ROW'] = np.arange(start, start + len(chunk))
+
+    points = chunk.geometry.representative_point()
+    cell_x = np.floor(points.x.to_numpy() / cell_size).astype(int)
+    cell_y = np.floor(points.y.to_numpy() / cell_size).astype(int)
+    chunk['_CELL'] = [f'{x}_{y}' for x, y in zip(cell_x, cell_y)]
+
+    cells = []
+    for cell, cell_lines in chunk.groupby('_CELL'):
+        cell_dir = os.path.join(workdir, 'partitions', cell)
+        os.makedirs(cell_dir, exist_ok=True)
+        cell_lines.drop(columns=['_CELL']).to_pickle(os.path.join(cell_dir, f'chunk_{start:09d}.pkl'))
+        cells.append(cell)
+    return cells
+
+
+def assign_cell(cell, workdir):
+    """
+    Spatially join every line in one grid cell to the FERC regions it intersects.
+    """
+    cell_dir = os.path.join(workdir, 'partitions', cell)
+    pieces = [pd.read_pickle(os.path.join(cell_dir, f)) for f in sorted(os.listdir(cell_dir))]
+    cell_lines = gpd.GeoDataFrame(pd.concat(pieces), crs=pieces[0].crs)
+
+    # A line crossing a border matches several regions, exactly as the per-region sjoin in TASK2
+    assigned = gpd.sjoin(cell_lines, _REGIONS, how='inner', predicate='intersects')
+
+    registry_by_name = region_by_name(load_registry())
+    regions = []
+    for ferc_name, region_lines in assigned.groupby('FERC_1000 Regions'):
+        key = registry_by_name[ferc_name]['key']
+        region_dir = os.path.join(workdir, 'assigned', key)
+        os.makedirs(region_dir, exist_ok=True)
+        region_lines.to_pickle(os.path.join(region_dir, f'{cell}.pkl'))
+        regions.append(key)
+    return regions
+
+
+def process_region(region, workdir):
+    """
+    Run the TASK3 capacity estimate and line merge for one region and return its totals.
+    """
+    registry_entry = {r['key']: r for r in load_registry()}[region]
+    region_dir = os.path.join(workdir, 'assigned', region)
+    pieces = [pd.read_pickle(os.path.join(region_dir, f)) for f in sorted(os.listdir(region_dir))]
+    transmission = gpd.GeoDataFrame(pd.concat(pieces), crs=pieces[0].crs)
+
+    # Restore the original HIFLD row order so merge_lines sees lines in the same order as TASK3
+    transmission = transmission.sort_values('_ROW').drop(columns=['_ROW']).reset_index(drop=True)
+    transmission = prepare_region_lines(transmission)
+    transmission.to_file(processed_path(registry_entry), driver='GeoJSON')
+
+    merged_transmission = finalize_merged_lines(merge_lines(transmission))
+    write_merged_lines(merged_transmission, registry_entry)
+
+    region_summary = {
+        'Region': region,
+        'Total_Power_Capacity': merged_transmission['POWER_CAPACITY'].sum() if 'POWER_CAPACITY' in merged_transmission.columns else np.nan,
+        'Total_Line_Length_MI': merged_transmission['LINE_LENGTH_MILES'].sum() if 'LINE_LENGTH_MILES' in merged_transmission.columns else np.nan
+    }
+    if 'TYPE' in merged_transmission.columns:
+        region_summary.update(merged_transmission['TYPE'].value_counts().to_dict())
+    return region_summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Partitioned out-of-core run of the TASK2/TASK3 line pipeline.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='HIFLD rows read per partition task')
+    parser.add_argument('--cell-size', type=float, default=5.0, help='grid cell size in region CRS units (degrees)')
+    parser.add_argument('--workdir', default='data/partitions_tmp', help='scratch directory for spilled partitions')
+    parser.add_argument('--keep-workdir', action='store_true', help='keep the scratch directory after the run')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.workdir):
+        shutil.rmtree(args.workdir)
+    os.makedirs(args.workdir)
+
+    # Region geometry files consumed by TASK4, identical to TASK2's output
+    ferc1000 = load_regions()
+    for region in load_registry():
+        region_geometry = ferc1000[ferc1000['FERC_1000 Regions'] == region['name']]
+        region_geometry.to_file(geometry_path(region), driver='GeoJSON')
+
+    # Stage 1: partition. At most two chunks per worker are in flight, so the reader never
+    # holds more than that in memory
+    total_rows = 0
+    cells = set()
+    pending = set()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for start, chunk in read_chunks(HIFLD_PATH, args.chunk_size):
+            if len(pending) >= 2 * args.workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cells.update(future.result())
+            pending.add(pool.submit(partition_chunk, start, chunk, ferc1000.crs, args.cell_size, args.workdir))
+            total_rows += len(chunk)
+        for future in pending:
+            cells.update(future.result())
+    cells = sorted(cells)
+    print(f'Partitioned {total_rows} lines into {len(cells)} grid cells')
+
+    # Stage 2: region assignment
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        region_lists = pool.map(assign_cell, cells, [args.workdir] * len(cells))
+        regions = sorted(set(region for region_list in region_lists for region in region_list))
+    print(f'Assigned lines to regions: {regions}')
+
+    # Stage 3: per-region length/capacity and merge
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        region_summaries = list(pool.map(process_region, regions, [args.workdir] * len(regions)))
+
+    # Stage 4: summarize
+    summary_df = pd.DataFrame(region_summaries)
+    summary_df.fillna(0, inplace=True)
+    print(summary_df)
+    summary_df.to_csv('data/partitioned_summary.csv', index=False)
+
+    if not args.keep_workdir:
+        shutil.rmtree(args.workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Region registry shared by every task. The FERC 1000 regions of interest, their file names,
+# plot colors and the BA regions / states / counties they are built from live in
+# IGDAL_PROJECT_REGIONS.json, so adding or changing a region needs no code edits.
+#
+# Each region is a dict with:
+#   name            FERC 1000 region name as it appears in FERC_1000_Regions.geojson, e.g. 'ISO-NE'
+#   key             short name used for the processed and merged line files, e.g. 'ISONE'
+#   file_stem       stem of the region geometry and transmission files, e.g. 'iso_ne'
+#   color           plot color
+#   label           long name for legends
+#   ferc_regions    'FERC_1000 Regions' values from BA_FERC1000.csv rolled into this region
+#   subtract        regions whose area is removed from this one
+#   extra_states    state abbreviations whose counties are added to this region
+#   extra_counties  [state, county name] pairs added to this region
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'IGDAL_PROJECT_REGIONS.json')
+
+
+def load_registry(path=REGISTRY_PATH):
+    with open(path) as f:
+        registry = json.load(f)
+    for region in registry:
+        region.setdefault('key', region['name'].replace('-', ''))
+        region.setdefault('file_stem', region['name'].lower().replace('-', '_'))
+        region.setdefault('color', '#cccccc')
+        region.setdefault('label', region['name'])
+        region.setdefault('ferc_regions', [region['name']])
+        region.setdefault('subtract', [])
+        region.setdefault('extra_states', [])
+        region.setdefault('extra_counties', [])
+    return registry
+
+
+def region_by_name(registry):
+    return {region['name']: region for region in registry}
+
+
+def ferc_rollup(registry):
+    """
+    Map each BA-level 'FERC_1000 Regions' value to the registry region it belongs to.
+    """
+    return {ferc_region: region['name'] for region in registry for ferc_region in region['ferc_regions']}
+
+
+def geometry_path(region):
+    return f"data/{region['file_stem']}geometry.geojson"
+
+
+def transmission_path(region):
+    return f"data/transmission{region['file_stem'].upper()}.geojson"
+
+
+def processed_path(region):
+    return f"{region['key']}_processed.geojson"
+
+
+def merged_path(region):
+    return f"data/mergedtransmission{region['key']}.geojson"
+
+
+def coordstore_path(region):
+    return f"data/coordstore/merged{region['key']}"
+
+
+def map_regions(func, region_data, workers=None):
+    """
+    Apply func to every value of a {region key: data} dict, optionally in a process pool.
+    The worker count defaults to the IGDAL_WORKERS environment variable (serial if unset).
+    """
+    if workers is None:
+        workers = int(os.environ.get('IGDAL_WORKERS', '1'))
+    keys = list(region_data.keys())
+    if workers <= 1:
+        return {key: func(region_data[key]) for key in keys}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(keys, pool.map(func, [region_data[key] for key in keys])))
@@ -14,10 +14,22 @@ source ~/miniconda3/etc/profile.d/conda.sh
 conda activate project_env
 
 cd $WORK
-# Run your Python script
+# Run your Python script (add --no-plots to any task to skip figures and never import matplotlib/seaborn)
+# (add --fast-eda to TASK3 to summarize columns from one-pass sketches and sample-based KDE/ECDF plots)
 python IGDAL_PROJECT_TASK1_MAKEFERC.py
 python IGDAL_PROJECT_TASK2_MERGEWITHHIFLD.py
 python IGDAL_PROJECT_TASK3_ROUGHANALYSIS.py
+python IGDAL_PROJECT_INTERFACES.py
 python IGDAL_PROJECT_TASK4_MACHINELEARNING.py
 
+# Optional: partitioned out-of-core replacement for TASK2 and TASK3 on national-scale data
+# python IGDAL_PROJECT_PARTITIONED.py --workers 4
 
+# Optional: incremental refresh from a new HIFLD release (only changed lines are reprocessed)
+# python IGDAL_PROJECT_SNAPSHOTS.py data/Electric__Power_Transmission_Lines.geojson --date 2024-06-01
+
+# Optional: offline tiled map of the regions and merged lines (open tiles/index.html)
+# python IGDAL_PROJECT_TILES.py --min-zoom 3 --max-zoom 10
+
+# Optional: measure task start-up time and which heavy modules each import pulls in
+# python IGDAL_PROJECT_BENCH.py startup --repeat 5
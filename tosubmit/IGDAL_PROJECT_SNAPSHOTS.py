@@ -0,0 +1,210 @@
+# This script maintains a snapshot store of successive HIFLD transmission line releases.
+# Each release is diffed against the previous release by line ID and a hash of its geometry and
+# attributes. The IDs and hashes of every release line are stored, including lines outside all
+# registry regions and lines dropped for a negative voltage, so those are not reprocessed. Only added, removed or changed lines are sent through region assignment,
+# capacity estimation and merge_lines, so a monthly refresh costs time proportional to what
+# changed rather than to the whole network.
+#
+# merge_lines only ever merges lines that share OWNER and VOLTAGE, so merged lines are cached
+# per (region, OWNER, VOLTAGE) group and only groups touched by the delta are re-merged.
+#
+# Outputs:
+#   data/snapshots/ids.pkl                 ID -> hash of every line of the latest release
+#   data/snapshots/lines.pkl               processed lines of the latest release (EPSG:4326)
+#   data/snapshots/merged.pkl              merged lines of the latest release, per group
+#   data/snapshots/history.csv             one row per ingested release with delta counts
+#   data/buildout_timeseries.csv           per-year build-out per FERC region
+#   data/mergedtransmission<REGION>.geojson  refreshed merged lines for TASK4
+#
+# Usage: python IGDAL_PROJECT_SNAPSHOTS.py data/Electric__Power_Transmission_Lines.geojson --date 2024-06-01
+
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from IGDAL_PROJECT_LINES import (
+    HIFLD_DROP_COLUMNS, prepare_region_lines, merge_lines, finalize_merged_lines, write_merged_lines
+)
+from IGDAL_PROJECT_REGIONS import load_registry
+
+SNAPSHOT_DIR = 'data/snapshots'
+IDS_PATH = os.path.join(SNAPSHOT_DIR, 'ids.pkl')
+LINES_PATH = os.path.join(SNAPSHOT_DIR, 'lines.pkl')
+MERGED_PATH = os.path.join(SNAPSHOT_DIR, 'merged.pkl')
+HISTORY_PATH = os.path.join(SNAPSHOT_DIR, 'history.csv')
+FERC_PATH = 'data/FERC_1000_Regions.geojson'
+
+# Attributes that feed region assignment, capacity estimation or merging
+HASH_COLUMNS = ['TYPE', 'STATUS', 'OWNER', 'VOLTAGE', 'VOLT_CLASS', 'SOURCEDATE']
+
+
+def line_hashes(transmission):
+    """
+    Hash each line's geometry and downstream attributes into one uint64 per row.
+    """
+    hash_frame = pd.DataFrame({
+        column: transmission[column].astype(str) for column in HASH_COLUMNS if column in transmission.columns
+    })
+    hash_frame['WKB'] = transmission.geometry.to_wkb(hex=True)
+    return pd.util.hash_pandas_object(hash_frame, index=False).to_numpy()
+
+
+def group_keys(lines):
+    # merge_lines never merges across OWNER or VOLTAGE, so each group can be merged on its own
+    return lines['REGION'].astype(str) + '|' + lines['OWNER'].astype(str) + '|' + lines['VOLTAGE'].astype(str)
+
+
+def load_release(path, crs):
+    transmission = gpd.read_file(path)
+    transmission = transmission.to_crs(crs)
+    transmission.drop(columns=[c for c in HIFLD_DROP_COLUMNS if c in transmission.columns], inplace=True)
+    transmission['ID'] = transmission['ID'].astype(str)
+    # The store is keyed by ID, so a release must not repeat one
+    transmission = transmission.drop_duplicates('ID').reset_index(drop=True)
+    transmission['_HASH'] = line_hashes(transmission)
+    # Release row order, so re-merged groups see lines in the same order as TASK3
+    transmission['_ROW'] = np.arange(len(transmission))
+    return transmission
+
+
+def assign_regions(delta, ferc1000):
+    """
+    Region assignment and capacity estimation for the delta lines only.
+    """
+    if delta.empty:
+        return gpd.GeoDataFrame(columns=list(delta.columns) + ['REGION'], geometry='geometry', crs='EPSG:4326')
+    assigned = gpd.sjoin(delta, ferc1000, how='inner', predicate='intersects')
+    assigned['REGION'] = assigned['FERC_1000 Regions'].map({r['name']: r['key'] for r in load_registry()})
+    return prepare_region_lines(assigned)
+
+
+def remerge_groups(lines, groups):
+    """
+    Re-run merge_lines for the given (region, OWNER, VOLTAGE) groups.
+    """
+    lines = lines[lines['_GROUP'].isin(groups)].sort_values('_ROW')
+    merged_pieces = []
+    for group, group_lines in lines.groupby('_GROUP', sort=False):
+        merged = merge_lines(group_lines.reset_index(drop=True))
+        if merged.empty:
+            continue
+        merged = finalize_merged_lines(merged)
+        merged['REGION'] = group_lines['REGION'].iloc[0]
+        merged['_GROUP'] = group
+        merged_pieces.append(merged)
+    if not merged_pieces:
+        return None
+    return gpd.GeoDataFrame(pd.concat(merged_pieces, ignore_index=True), crs=merged_pieces[0].crs)
+
+
+def buildout_timeseries(lines):
+    """
+    Per-year build-out per FERC region from the processed (unmerged) lines.
+    """
+    timeseries = lines.groupby(['REGION', 'YEAR']).agg(
+        LINES=('ID', 'size'),
+        LINE_LENGTH_MILES=('LINE_LENGTH_MILES', 'sum'),
+        POWER_CAPACITY=('POWER_CAPACITY', 'sum')
+    ).reset_index()
+    cumulative = timeseries.groupby('REGION')[['LINES', 'LINE_LENGTH_MILES', 'POWER_CAPACITY']].cumsum()
+    timeseries[['CUM_LINES', 'CUM_LINE_LENGTH_MILES', 'CUM_POWER_CAPACITY']] = cumulative.to_numpy()
+    return timeseries
+
+
+def ingest(path, release_date):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    registry = load_registry()
+    ferc1000 = gpd.read_file(FERC_PATH)
+    ferc1000 = ferc1000[ferc1000['FERC_1000 Regions'].isin([r['name'] for r in registry])]
+    ferc1000 = ferc1000[['FERC_1000 Regions', 'geometry']]
+    release = load_release(path, ferc1000.crs)
+
+    if os.path.exists(LINES_PATH):
+        lines = pd.read_pickle(LINES_PATH)
+        merged = pd.read_pickle(MERGED_PATH)
+    else:
+        lines = None
+        merged = None
+
+    # Diff the release against the previous release by ID and hash
+    if os.path.exists(IDS_PATH):
+        stored_hashes = pd.read_pickle(IDS_PATH)
+    elif lines is not None:
+        # Store written before ids.pkl existed: only the region-assigned lines are known
+        stored_hashes = lines.drop_duplicates('ID').set_index('ID')['_HASH']
+    else:
+        stored_hashes = pd.Series(dtype='uint64')
+    release_hashes = release.set_index('ID')['_HASH']
+    added_ids = release_hashes.index.difference(stored_hashes.index)
+    removed_ids = stored_hashes.index.difference(release_hashes.index)
+    common_ids = release_hashes.index.intersection(stored_hashes.index)
+    changed_ids = common_ids[release_hashes[common_ids].to_numpy() != stored_hashes[common_ids].to_numpy()]
+    print(f'{release_date}: {len(added_ids)} added, {len(removed_ids)} removed, {len(changed_ids)} changed')
+
+    stale_ids = removed_ids.union(changed_ids)
+    fresh_ids = added_ids.union(changed_ids)
+
+    # Groups touched by the delta, on both the old and the new side
+    touched_groups = set()
+    if lines is not None:
+        stale = lines['ID'].isin(stale_ids)
+        touched_groups.update(lines.loc[stale, '_GROUP'])
+        lines = lines[~stale]
+
+    fresh = assign_regions(release[release['ID'].isin(fresh_ids)], ferc1000)
+    fresh['_GROUP'] = group_keys(fresh)
+    touched_groups.update(fresh['_GROUP'])
+
+    if lines is None:
+        lines = fresh
+    elif not fresh.empty:
+        lines = gpd.GeoDataFrame(pd.concat([lines, fresh], ignore_index=True), crs=lines.crs)
+
+    # Unchanged lines may have moved within the release
+    lines['_ROW'] = lines['ID'].map(release.set_index('ID')['_ROW']).to_numpy()
+
+    remerged = remerge_groups(lines, touched_groups)
+    if merged is not None:
+        merged = merged[~merged['_GROUP'].isin(touched_groups)]
+    pieces = [m for m in (merged, remerged) if m is not None and not m.empty]
+    merged = gpd.GeoDataFrame(pd.concat(pieces, ignore_index=True), crs=pieces[0].crs) if pieces else merged
+
+    release_hashes.to_pickle(IDS_PATH)
+    lines.to_pickle(LINES_PATH)
+    merged.to_pickle(MERGED_PATH)
+
+    history = pd.DataFrame([{
+        'RELEASE_DATE': release_date,
+        'SOURCE_FILE': path,
+        'LINES': len(release),
+        'ADDED': len(added_ids),
+        'REMOVED': len(removed_ids),
+        'CHANGED': len(changed_ids),
+        'REMERGED_GROUPS': len(touched_groups)
+    }])
+    history.to_csv(HISTORY_PATH, mode='a', header=not os.path.exists(HISTORY_PATH), index=False)
+
+    buildout_timeseries(lines).to_csv('data/buildout_timeseries.csv', index=False)
+
+    # Refresh the merged region files only for regions that changed
+    touched_regions = set(group.split('|')[0] for group in touched_groups)
+    for region in registry:
+        if region['key'] not in touched_regions:
+            continue
+        region_merged = merged[merged['REGION'] == region['key']].drop(columns=['REGION', '_GROUP'])
+        write_merged_lines(region_merged, region)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest a HIFLD release into the snapshot store.')
+    parser.add_argument('path', help='HIFLD transmission lines GeoJSON')
+    parser.add_argument('--date', required=True, help='release date, e.g. 2024-06-01')
+    args = parser.parse_args(argv)
+    ingest(args.path, args.date)
+
+
+if __name__ == '__main__':
+    main()
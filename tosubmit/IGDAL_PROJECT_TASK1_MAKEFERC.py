@@ -1,15 +1,15 @@
 # %%
+import argparse
+
 import geopandas as gpd
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+from IGDAL_PROJECT_REGIONS import load_registry, ferc_rollup
 
 # The goal of this script is to create a new GeoDataFrame that approximates FERC Order 1000 regions.
 # It accomplishes this by aggregating the control areas in the 'Control__Areas.geojson' file
 # by the Balancing Authority (BA) they belong to.
-
-# Load the GeoJSON file and filter columns
-ba_gdf = gpd.read_file('data/Control__Areas.geojson')
+#
+# matplotlib is only imported when plotting, so `--no-plots` runs never pay for it.
 
 # Define US states of interest
 us_states = [
@@ -33,212 +33,255 @@ state_abbreviations = {
     'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
 }
 
-# Filter the GeoDataFrame to include only rows where 'STATE' is in the list of US states
-ba_gdf = ba_gdf[ba_gdf['STATE'].isin(us_states)]
-
-# Check the coordinate reference system (CRS) of ba_gdf and unique BA names
-print(ba_gdf.crs)
-print(ba_gdf['NAME'].unique())
 
+def load_control_areas():
+    # Load the GeoJSON file and filter columns
+    ba_gdf = gpd.read_file('data/Control__Areas.geojson')
 
-# Load county shapefile and convert to the same CRS as ba_gdf
-counties = gpd.read_file('data/US_COUNTY_SHPFILE/US_county_cont.shp')
-counties = counties.to_crs(ba_gdf.crs)
+    # Filter the GeoDataFrame to include only rows where 'STATE' is in the list of US states
+    ba_gdf = ba_gdf[ba_gdf['STATE'].isin(us_states)]
 
-# Map state names to abbreviations
-counties['STATE_NAME'] = counties['STATE_NAME'].map(state_abbreviations)
-# Drop rows with NaN in 'STATE_NAME'
-counties = counties.dropna(subset=['STATE_NAME'])
+    # Check the coordinate reference system (CRS) of ba_gdf and unique BA names
+    print(ba_gdf.crs)
+    print(ba_gdf['NAME'].unique())
+    return ba_gdf
 
-# Read in BA_FERC1000.csv and drop the 'Notes' column
-ba_to_ferc_csv = pd.read_csv('data/BA_FERC1000.csv')
-ba_to_ferc_csv = ba_to_ferc_csv.drop(columns='Notes')
 
-# Clean up the 'NAME' and 'Balancing Authority' columns
-ba_gdf['NAME'] = ba_gdf['NAME'].str.lower().str.strip()
-ba_to_ferc_csv['Balancing Authority'] = ba_to_ferc_csv['Balancing Authority'].str.lower().str.strip()
+def load_counties(crs):
+    # Load county shapefile and convert to the same CRS as ba_gdf
+    counties = gpd.read_file('data/US_COUNTY_SHPFILE/US_county_cont.shp')
+    counties = counties.to_crs(crs)
 
-# Merge ba_gdf and ba_to_ferc_csv
-ba2_gdf = ba_gdf.merge(ba_to_ferc_csv, how='left', left_on='NAME', right_on='Balancing Authority')
+    # Map state names to abbreviations
+    counties['STATE_NAME'] = counties['STATE_NAME'].map(state_abbreviations)
+    # Drop rows with NaN in 'STATE_NAME'
+    counties = counties.dropna(subset=['STATE_NAME'])
+    return counties
 
-# Exclude 'WestConnect' from 'FERC_1000 Regions'
-ba2_gdf = ba2_gdf[~ba2_gdf['FERC_1000 Regions'].isin(['WestConnect'])]
 
+# BA-level columns summed per FERC region
+aggregate_columns = ['AVAIL_CAP', 'TOTAL_CAP', 'PEAK_LOAD', 'MIN_LOAD', 'SHAPE__Area', 'SHAPE__Length']
 
+# Words dropped from BA names before matching, so 'Foo Power Co.' and 'foo power company' agree
+ba_name_suffixes = r'\b(inc|llc|lp|co|corp|corporation|company|the)\b'
 
-# Exclude NYISO from filtering
-non_nyiso = ba2_gdf[ba2_gdf['FERC_1000 Regions'] != 'NYISO']
-
-# Apply filters for valid data to all regions except NYISO
-non_nyiso = non_nyiso[
-    (non_nyiso['TOTAL_CAP'] >= 0) & (non_nyiso['AVAIL_CAP'] >= 0) &
-    (non_nyiso['PEAK_LOAD'] >= 0) & (non_nyiso['MIN_LOAD'] >= 0)
-]
 
-# Ensure available capacity is not greater than total capacity
-non_nyiso = non_nyiso[non_nyiso['AVAIL_CAP'] <= non_nyiso['TOTAL_CAP']]
-
-# Ensure peak load is greater than or equal to minimum load
-non_nyiso = non_nyiso[non_nyiso['PEAK_LOAD'] >= non_nyiso['MIN_LOAD']]
-
-# Drop rows with missing values in critical columns
-non_nyiso = non_nyiso.dropna(
-    subset=['TOTAL_CAP', 'AVAIL_CAP', 'PEAK_LOAD', 'MIN_LOAD', 'SHAPE__Area', 'SHAPE__Length']
-)
-
-# Combine the filtered non-NYISO data back with the NYISO data
-nyiso = ba2_gdf[ba2_gdf['FERC_1000 Regions'] == 'NYISO']
-ba2_gdf_filtered = pd.concat([non_nyiso, nyiso])
-
-# Group by 'FERC_1000 Regions' and sum the specified columns
-ferc1000_avail = ba2_gdf.groupby('FERC_1000 Regions')['AVAIL_CAP'].sum()
-ferc1000_totals = ba2_gdf.groupby('FERC_1000 Regions')['TOTAL_CAP'].sum()
-ferc1000_peaks = ba2_gdf.groupby('FERC_1000 Regions')['PEAK_LOAD'].sum()
-ferc1000_min = ba2_gdf.groupby('FERC_1000 Regions')['MIN_LOAD'].sum()
-ferc1000_area = ba2_gdf.groupby('FERC_1000 Regions')['SHAPE__Area'].sum()
-ferc1000_length = ba2_gdf.groupby('FERC_1000 Regions')['SHAPE__Length'].sum()
-
-# Dissolve ba2_gdf by 'FERC_1000 Regions'
-ferc1000_gdf = ba2_gdf.dissolve(by='FERC_1000 Regions').reset_index()
-
-# Replace columns in ferc1000_gdf with grouped sums
-ferc1000_gdf['AVAIL_CAP'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_avail)
-ferc1000_gdf['TOTAL_CAP'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_totals)
-ferc1000_gdf['PEAK_LOAD'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_peaks)
-ferc1000_gdf['MIN_LOAD'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_min)
-ferc1000_gdf['SHAPE__Area'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_area)
-ferc1000_gdf['SHAPE__Length'] = ferc1000_gdf['FERC_1000 Regions'].map(ferc1000_length)
-
-# Merge SERTP, FRCC, and SCRTP into SE
-ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == 'SERTP', 'FERC_1000 Regions'] = 'SE'
-ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == 'FRCC', 'FERC_1000 Regions'] = 'SE'
-ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == 'SCRTP', 'FERC_1000 Regions'] = 'SE'
-
-# Check for overlapping areas between SPP and SE
-spp = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == 'SPP']
-se = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == 'SE']
-spp_se = gpd.overlay(spp, se, how='intersection')
-print(spp_se)
-
-
-# Remove overlapping areas (subtract SPP from SE)
-se_without_spp = gpd.overlay(se, spp, how='difference')
-
-# Update the SE region with the new geometry
-ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == 'SE', 'geometry'] = se_without_spp['geometry']
-
-# Manually add missing counties in FL, SC, AL, and TN to the SE region
-fl_counties = counties[counties['STATE_NAME'].str.lower() == 'fl']
-sc_counties = counties[counties['STATE_NAME'].str.lower() == 'sc']
-al_counties = counties[counties['STATE_NAME'].str.lower() == 'al']
-
-tn_counties = counties[counties['STATE_NAME'].str.lower() == 'tn']
-monroe = tn_counties[tn_counties['NAME'].str.lower() == 'monroe']
-blount = tn_counties[tn_counties['NAME'].str.lower() == 'blount']
-sevier = tn_counties[tn_counties['NAME'].str.lower() == 'sevier']
-
-# Dissolve counties into single geometries
-fl_geometry = fl_counties.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-sc_geometry = sc_counties.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-al_geometry = al_counties.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-
-monroe_geometry = monroe.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-blount_geometry = blount.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-sevier_geometry = sevier.dissolve(by='STATE_NAME')['geometry'].iloc[0]
-
-# Union the geometries
-m_b_union = monroe_geometry.union(blount_geometry)
-m_b_s_union = m_b_union.union(sevier_geometry)
-
-fl_sc_union = fl_geometry.union(sc_geometry)
-fl_sc_al_union = fl_sc_union.union(al_geometry)
-fl_sc_al_mbs_union = fl_sc_al_union.union(m_b_s_union)
-
-# Merge the new geometries into the SE region
-se_geometry = se_without_spp.unary_union
-se_updated_geometry = se_geometry.union(fl_sc_al_mbs_union)
-
-# Update the SE region with the combined geometry
-ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == 'SE', 'geometry'] = se_updated_geometry
-
-# Drop regions not of interest
-ferc1000_gdf = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'].isin(
-    ['SE', 'NYISO', 'ERCOT', 'CAISO', 'MISO', 'ISO-NE', 'PJM', 'SPP']
-)]
-
-# Dissolve to ensure proper geometry
-ferc1000_gdf = ferc1000_gdf.dissolve(by='FERC_1000 Regions').reset_index()
-
-# Print columns and first 5 rows
-print(ferc1000_gdf.columns)
-print(ferc1000_gdf.head())
-
-# Prepare state borders for plotting
-state_borders = counties.dissolve(by='STATE_NAME').reset_index()
-state_borders = state_borders[state_borders['STATE_NAME'].isin(us_states)]
-state_borders = state_borders.to_crs(ferc1000_gdf.crs)
-
-
-print(ferc1000_gdf['FERC_1000 Regions'].unique())
-
-
-
-# Define region colors for plotting
-regions = ferc1000_gdf['FERC_1000 Regions'].unique()
-region_colors = {
-    'CAISO': '#ffcc00',   # California ISO
-    'ERCOT': '#bf5700',   # Electric Reliability Council of Texas
-    'ISO-NE': '#8a2be2',  # ISO New England
-    'SE': '#00bfff',      # The Southeast
-    'NYISO': '#ff0000',   # New York ISO
-    'PJM': '#228b22',     # PJM Interconnection
-    'MISO': '#ff69b4',    # Midcontinent ISO
-    'SPP': '#ff8c00'      # Southwest Power Pool
-}
-
-# Create legend patches
-legend_patches = []
-for region, color in region_colors.items():
-    patch = mpatches.Patch(color=color, label=region)
-    legend_patches.append(patch)
-
-# Plotting
-fig, ax = plt.subplots(1, 1, figsize=(15, 10))
-
-# Plot each region
-for region in regions:
-    ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == region].plot(
-        ax=ax,
-        color=region_colors.get(region, '#cccccc'),
-        edgecolor='black'
+def normalize_ba_names(names):
+    """
+    Vectorized BA name normalization: lowercase, '&' -> 'and', drop punctuation and corporate suffixes.
+    """
+    return (
+        names.str.lower()
+        .str.replace('&', ' and ', regex=False)
+        .str.replace(r'[^a-z0-9 ]', ' ', regex=True)
+        .str.replace(ba_name_suffixes, ' ', regex=True)
+        .str.split().str.join(' ')
     )
 
-# Plot state borders
-state_borders.boundary.plot(ax=ax, color='black', linewidth=0.5)
-
-# Add title and labels
-plt.title('FERC Order 1000 Regions', fontsize=20)
-plt.xlabel('Longitude', fontsize=15)
-plt.ylabel('Latitude', fontsize=15)
-
-# Add legend
-plt.legend(handles=legend_patches, loc='lower left', fontsize=12)
-
-# Save and show the figure
-plt.savefig('FERC_1000_Regions.png', dpi=300)
-plt.savefig('FERC_1000_Regions.pdf')
-plt.show()
-
 
+def build_ba_lookup(ba_to_ferc_csv):
+    """
+    Compile BA_FERC1000.csv into a lookup table indexed by normalized BA name.
+    """
+    lookup = ba_to_ferc_csv.set_index(normalize_ba_names(ba_to_ferc_csv['Balancing Authority']))
+    return lookup[~lookup.index.duplicated(keep='first')]
+
+
+def match_ba_names(names, lookup, cutoff=0.9):
+    """
+    Match control area names to lookup keys: exact normalized match first, then a fuzzy
+    fallback on the (few) unique names left over. Returns the matched key per name and a
+    report of every name that needed the fallback, matched or not.
+    """
+    import difflib
+
+    keys = normalize_ba_names(names)
+    exact = keys.isin(lookup.index)
+
+    report = []
+    fuzzy_keys = {}
+    for key in keys[~exact].dropna().unique():
+        candidates = difflib.get_close_matches(key, lookup.index, n=1, cutoff=cutoff)
+        if candidates:
+            fuzzy_keys[key] = candidates[0]
+            score = difflib.SequenceMatcher(None, key, candidates[0]).ratio()
+            report.append({'NAME': key, 'MATCH': candidates[0], 'SCORE': round(score, 3)})
+        else:
+            report.append({'NAME': key, 'MATCH': None, 'SCORE': None})
+    matched = keys.where(exact, keys.map(fuzzy_keys))
+    return matched, pd.DataFrame(report, columns=['NAME', 'MATCH', 'SCORE'])
+
+
+def attach_ferc_regions(ba_gdf):
+    # Read in BA_FERC1000.csv and drop the 'Notes' column
+    ba_to_ferc_csv = pd.read_csv('data/BA_FERC1000.csv')
+    ba_to_ferc_csv = ba_to_ferc_csv.drop(columns='Notes')
+
+    # Clean up the 'NAME' and 'Balancing Authority' columns
+    ba_gdf['NAME'] = ba_gdf['NAME'].str.lower().str.strip()
+    lookup = build_ba_lookup(ba_to_ferc_csv)
+    lookup['Balancing Authority'] = lookup['Balancing Authority'].str.lower().str.strip()
+
+    # Look up each control area's BA and attach the BA_FERC1000.csv columns
+    matched, report = match_ba_names(ba_gdf['NAME'], lookup)
+    ba2_gdf = ba_gdf.assign(BA_KEY=matched).join(lookup, on='BA_KEY').drop(columns='BA_KEY')
+
+    # Report BAs that needed the fuzzy fallback or could not be matched at all
+    print(f"{report['MATCH'].notna().sum()} BAs matched by fuzzy fallback, {report['MATCH'].isna().sum()} unmatched")
+    report.to_csv('data/unmatched_BA_report.csv', index=False)
+
+    # Exclude 'WestConnect' from 'FERC_1000 Regions'
+    ba2_gdf = ba2_gdf[~ba2_gdf['FERC_1000 Regions'].isin(['WestConnect'])]
+    return ba2_gdf
+
+
+def aggregate_ferc_regions(ba2_gdf):
+    # Valid data for all regions except NYISO, whose BA records are kept as reported:
+    # non-negative capacities and loads, available <= total capacity, peak >= minimum load,
+    # and no missing values in critical columns
+    valid = (
+        (ba2_gdf['TOTAL_CAP'] >= 0) & (ba2_gdf['AVAIL_CAP'] >= 0) &
+        (ba2_gdf['PEAK_LOAD'] >= 0) & (ba2_gdf['MIN_LOAD'] >= 0) &
+        (ba2_gdf['AVAIL_CAP'] <= ba2_gdf['TOTAL_CAP']) &
+        (ba2_gdf['PEAK_LOAD'] >= ba2_gdf['MIN_LOAD']) &
+        ba2_gdf[aggregate_columns].notna().all(axis=1)
+    )
+    ba2_gdf_filtered = ba2_gdf[valid | (ba2_gdf['FERC_1000 Regions'] == 'NYISO')]
+
+    # All six sums in one grouped pass over the filtered frame
+    ferc1000_sums = ba2_gdf_filtered.groupby('FERC_1000 Regions')[aggregate_columns].sum()
+
+    # Dissolve ba2_gdf by 'FERC_1000 Regions'; the geometry keeps every control area,
+    # filtered or not, so region coverage does not depend on the BA data quality
+    ferc1000_gdf = ba2_gdf.drop(columns=aggregate_columns).dissolve(by='FERC_1000 Regions')
+
+    # Attach the grouped sums (regions with no valid BA rows get 0)
+    ferc1000_gdf = ferc1000_gdf.join(ferc1000_sums).reset_index()
+    ferc1000_gdf[aggregate_columns] = ferc1000_gdf[aggregate_columns].fillna(0)
+    return ferc1000_gdf
+
+
+def assemble_registry_regions(ferc1000_gdf, counties, registry):
+    # Roll BA-level FERC regions up into registry regions (e.g. SERTP, FRCC and SCRTP into SE)
+    rollup = {ferc_region: name for ferc_region, name in ferc_rollup(registry).items() if ferc_region != name}
+    ferc1000_gdf['FERC_1000 Regions'] = ferc1000_gdf['FERC_1000 Regions'].replace(rollup)
+
+    for region in registry:
+        if not (region['subtract'] or region['extra_states'] or region['extra_counties']):
+            continue
+        region_rows = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == region['name']]
+        region_geometry = region_rows.unary_union
+
+        # Remove overlapping areas of other regions (e.g. subtract SPP from SE)
+        for other in region['subtract']:
+            other_rows = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == other]
+            print(gpd.overlay(region_rows, other_rows, how='intersection'))
+            region_rows = gpd.overlay(region_rows, other_rows, how='difference')
+            region_geometry = region_rows.unary_union
+
+        # Manually add missing states and counties (e.g. FL, SC, AL and three TN counties to SE)
+        state_names = counties['STATE_NAME'].str.lower()
+        county_names = counties['NAME'].str.lower()
+        extra = state_names.isin([state.lower() for state in region['extra_states']])
+        for state, county in region['extra_counties']:
+            extra |= (state_names == state.lower()) & (county_names == county.lower())
+        if extra.any():
+            region_geometry = region_geometry.union(counties[extra].unary_union)
+
+        # Update the region with the combined geometry
+        ferc1000_gdf.loc[ferc1000_gdf['FERC_1000 Regions'] == region['name'], 'geometry'] = region_geometry
+
+    # Drop regions not of interest
+    ferc1000_gdf = ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'].isin(
+        [region['name'] for region in registry]
+    )]
+
+    # Dissolve to ensure proper geometry, summing the aggregates of rolled-up regions (e.g. SE)
+    aggfunc = {column: 'first' for column in ferc1000_gdf.columns if column not in ('FERC_1000 Regions', 'geometry')}
+    aggfunc.update({column: 'sum' for column in aggregate_columns})
+    ferc1000_gdf = ferc1000_gdf.dissolve(by='FERC_1000 Regions', aggfunc=aggfunc).reset_index()
+
+    # Print columns and first 5 rows
+    print(ferc1000_gdf.columns)
+    print(ferc1000_gdf.head())
+    print(ferc1000_gdf['FERC_1000 Regions'].unique())
+    return ferc1000_gdf
+
+
+def plot_ferc_regions(ferc1000_gdf, counties, registry):
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+
+    # Prepare state borders for plotting
+    state_borders = counties.dissolve(by='STATE_NAME').reset_index()
+    state_borders = state_borders[state_borders['STATE_NAME'].isin(us_states)]
+    state_borders = state_borders.to_crs(ferc1000_gdf.crs)
+
+    # Define region colors for plotting
+    regions = ferc1000_gdf['FERC_1000 Regions'].unique()
+    region_colors = {region['name']: region['color'] for region in registry}
+
+    # Create legend patches
+    legend_patches = []
+    for region in registry:
+        patch = mpatches.Patch(color=region['color'], label=region['label'])
+        legend_patches.append(patch)
+
+    # Plotting
+    fig, ax = plt.subplots(1, 1, figsize=(15, 10))
+
+    # Plot each region
+    for region in regions:
+        ferc1000_gdf[ferc1000_gdf['FERC_1000 Regions'] == region].plot(
+            ax=ax,
+            color=region_colors.get(region, '#cccccc'),
+            edgecolor='black'
+        )
+
+    # Plot state borders
+    state_borders.boundary.plot(ax=ax, color='black', linewidth=0.5)
+
+    # Add title and labels
+    plt.title('FERC Order 1000 Regions', fontsize=20)
+    plt.xlabel('Longitude', fontsize=15)
+    plt.ylabel('Latitude', fontsize=15)
+
+    # Add legend
+    plt.legend(handles=legend_patches, loc='lower left', fontsize=12)
+
+    # Save and show the figure
+    plt.savefig('FERC_1000_Regions.png', dpi=300)
+    plt.savefig('FERC_1000_Regions.pdf')
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build approximate FERC Order 1000 regions from BA control areas.')
+    parser.add_argument('--no-plots', action='store_true', help='skip the region map (matplotlib is never imported)')
+    args = parser.parse_args(argv)
+
+    # Regions of interest, their colors and how they are assembled come from IGDAL_PROJECT_REGIONS.json
+    registry = load_registry()
+
+    ba_gdf = load_control_areas()
+    counties = load_counties(ba_gdf.crs)
+    ba2_gdf = attach_ferc_regions(ba_gdf)
+    ferc1000_gdf = aggregate_ferc_regions(ba2_gdf)
+    ferc1000_gdf = assemble_registry_regions(ferc1000_gdf, counties, registry)
+
+    if not args.no_plots:
+        plot_ferc_regions(ferc1000_gdf, counties, registry)
+
+    # Drop unnecessary columns
+    ferc1000_gdf.drop(columns=[
+        'NAME', 'ADDRESS', 'CITY', 'STATE', 'ZIP', 'TELEPHONE',
+        'COUNTRY', 'WEBSITE', 'Balancing Authority', 'DOE_HGM Region'
+    ], inplace=True)
+
+    # Save ferc1000_gdf to a new GeoJSON file
+    ferc1000_gdf.to_file('data/FERC_1000_Regions.geojson', driver='GeoJSON')
 
-# Drop unnecessary columns
-ferc1000_gdf.drop(columns=[
-    'NAME', 'ADDRESS', 'CITY', 'STATE', 'ZIP', 'TELEPHONE',
-    'COUNTRY', 'WEBSITE', 'Balancing Authority', 'DOE_HGM Region'
-], inplace=True)
 
 # %%
-
-# Save ferc1000_gdf to a new GeoJSON file
-ferc1000_gdf.to_file('data/FERC_1000_Regions.geojson', driver='GeoJSON')
-
+if __name__ == '__main__':
+    main()
@@ -1,107 +1,59 @@
 # This script merges the FERC 1000 regions with the HIFLD transmission lines dataset, and exports the resulting datasets to geojson files.
-# It also plots the transmission lines in each of the FERC 1000 regions.
+# The per-region plots of the transmission lines are drawn in TASK3.
 
 # %%
-import geopandas as gpd
-import numpy as np
-import matplotlib.pyplot as plt
-
-# %% load ferc1000 regions
-ferc1000 = gpd.read_file('data/FERC_1000_Regions.geojson')
-
-ferc1000.drop(columns=['NAICS_CODE'], inplace=True)
-
-caiso = ferc1000[ferc1000['FERC_1000 Regions'] == 'CAISO']
-ercot = ferc1000[ferc1000['FERC_1000 Regions'] == 'ERCOT']
-iso_ne = ferc1000[ferc1000['FERC_1000 Regions'] == 'ISO-NE']
-se = ferc1000[ferc1000['FERC_1000 Regions'] == 'SE']
-nyiso = ferc1000[ferc1000['FERC_1000 Regions'] == 'NYISO']
-pjm = ferc1000[ferc1000['FERC_1000 Regions'] == 'PJM']
-miso = ferc1000[ferc1000['FERC_1000 Regions'] == 'MISO']
-spp = ferc1000[ferc1000['FERC_1000 Regions'] == 'SPP']
-
-
+import argparse
 
-# %%
-# in each of the datasets, drop everything except 'FERC_1000 Regions' and 'geometry'
-caiso = caiso[['FERC_1000 Regions', 'geometry']]
-ercot = ercot[['FERC_1000 Regions', 'geometry']]
-iso_ne = iso_ne[['FERC_1000 Regions', 'geometry']]
-se = se[['FERC_1000 Regions', 'geometry']]
-nyiso = nyiso[['FERC_1000 Regions', 'geometry']]
-pjm = pjm[['FERC_1000 Regions', 'geometry']]
-miso = miso[['FERC_1000 Regions', 'geometry']]
-spp = spp[['FERC_1000 Regions', 'geometry']]
-
-caiso.to_file('data/caisogeometry.geojson', driver='GeoJSON')
-ercot.to_file('data/ercotgeometry.geojson', driver='GeoJSON')
-iso_ne.to_file('data/iso_negeometry.geojson', driver='GeoJSON')
-se.to_file('data/segeometry.geojson', driver='GeoJSON')
-nyiso.to_file('data/nyisogeometry.geojson', driver='GeoJSON')
-pjm.to_file('data/pjmgeometry.geojson', driver='GeoJSON')
-miso.to_file('data/misogeometry.geojson', driver='GeoJSON')
-spp.to_file('data/sppgeometry.geojson', driver='GeoJSON')
+import geopandas as gpd
+from IGDAL_PROJECT_LINES import HIFLD_DROP_COLUMNS
+from IGDAL_PROJECT_REGIONS import load_registry, geometry_path, transmission_path
 
 
+def load_ferc_regions(registry):
+    # load ferc1000 regions
+    ferc1000 = gpd.read_file('data/FERC_1000_Regions.geojson')
 
+    ferc1000.drop(columns=['NAICS_CODE'], inplace=True)
 
-# %% 
-# load hifld transmission lines
-transmission = gpd.read_file('data/Electric__Power_Transmission_Lines.geojson')
+    # keep only the registry regions, and drop everything except 'FERC_1000 Regions' and 'geometry'
+    ferc1000 = ferc1000[ferc1000['FERC_1000 Regions'].isin([region['name'] for region in registry])]
+    ferc1000 = ferc1000[['FERC_1000 Regions', 'geometry']]
 
-#ensure that the CRS of the two datasets are the same
-transmission = transmission.to_crs(ferc1000.crs)
+    for region in registry:
+        ferc1000[ferc1000['FERC_1000 Regions'] == region['name']].to_file(geometry_path(region), driver='GeoJSON')
+    return ferc1000
 
 
+def load_transmission(crs):
+    # load hifld transmission lines
+    transmission = gpd.read_file('data/Electric__Power_Transmission_Lines.geojson')
 
-# %%
-# drop 'NAICS_CODE' column from transmission data
-transmission.drop(columns=['NAICS_CODE'], inplace=True)
-transmission.drop(columns=['NAICS_DESC'], inplace=True)
-transmission.drop(columns=['SOURCE'], inplace=True)
-transmission.drop(columns=['VAL_METHOD'], inplace=True)
-transmission.drop(columns=['INFERRED'], inplace=True)  
-transmission.drop(columns=['SUB_1'], inplace=True)
-transmission.drop(columns=['SUB_2'], inplace=True)
-transmission.drop(columns=['GlobalID'], inplace=True)
+    #ensure that the CRS of the two datasets are the same
+    transmission = transmission.to_crs(crs)
 
+    # drop HIFLD columns that are not needed downstream
+    transmission.drop(columns=HIFLD_DROP_COLUMNS, inplace=True)
+    return transmission
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Assign HIFLD transmission lines to the FERC 1000 regions.')
+    parser.add_argument('--no-plots', action='store_true', help='accepted for a uniform task interface; TASK2 does not plot')
+    parser.parse_args(argv)
 
-# %%
-# spacial join, inefficient method but works
-transmissioncaiso = gpd.sjoin(transmission, caiso, how='inner', op='intersects')
-transmissionercot = gpd.sjoin(transmission, ercot, how='inner', op='intersects')
-transmissioniso_ne = gpd.sjoin(transmission, iso_ne, how='inner', op='intersects')
-transmissionse = gpd.sjoin(transmission, se, how='inner', op='intersects')
-transmissionnyiso = gpd.sjoin(transmission, nyiso, how='inner', op='intersects')
-transmissionpjm = gpd.sjoin(transmission, pjm, how='inner', op='intersects')
-transmissionmiso = gpd.sjoin(transmission, miso, how='inner', op='intersects')
-transmissionspp = gpd.sjoin(transmission, spp, how='inner', op='intersects')
+    registry = load_registry()
+    ferc1000 = load_ferc_regions(registry)
+    transmission = load_transmission(ferc1000.crs)
 
-# %%
-# export the transmission files to geojson
-transmissioncaiso.to_file('data/transmissionCAISO.geojson', driver='GeoJSON')
-transmissionercot.to_file('data/transmissionERCOT.geojson', driver='GeoJSON')
-transmissioniso_ne.to_file('data/transmissionISO_NE.geojson', driver='GeoJSON')
-transmissionse.to_file('data/transmissionSE.geojson', driver='GeoJSON')
-transmissionnyiso.to_file('data/transmissionNYISO.geojson', driver='GeoJSON')
-transmissionpjm.to_file('data/transmissionPJM.geojson', driver='GeoJSON')
-transmissionmiso.to_file('data/transmissionMISO.geojson', driver='GeoJSON')
-transmissionspp.to_file('data/transmissionSPP.geojson', driver='GeoJSON')
+    # spatial join against all regions in one pass; a line crossing a border matches every region it touches
+    transmission_regions = gpd.sjoin(transmission, ferc1000, how='inner', predicate='intersects')
 
+    # export the transmission files to geojson
+    for region in registry:
+        transmission_region = transmission_regions[transmission_regions['FERC_1000 Regions'] == region['name']]
+        transmission_region.to_file(transmission_path(region), driver='GeoJSON')
 
 
 # %%
-
-
-
-
-
-
-
-
-
-
-
-
+if __name__ == '__main__':
+    main()
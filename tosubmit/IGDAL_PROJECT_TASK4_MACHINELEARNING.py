@@ -1,60 +1,19 @@
 # This script processes merged transmission data, integrates ACS demographic data at the region level,
 # performs hierarchical clustering, and visualizes the results including a dendrogram and correlation heatmaps.
+# censusdata, scikit-learn, scipy, matplotlib and seaborn are imported only in the functions that use them,
+# so `--no-plots` runs never import matplotlib or seaborn.
 
 # %% Import Libraries
+import argparse
+import os
+
 import geopandas as gpd
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import censusdata
-from sklearn.preprocessing import StandardScaler
-from scipy.cluster.hierarchy import linkage, dendrogram, fcluster
-from sklearn.metrics import silhouette_score
-import seaborn as sns
-
-# %% Load Merged Transmission Data
-merged_caiso = gpd.read_file('data/mergedtransmissionCAISO.geojson')
-merged_ercot = gpd.read_file('data/mergedtransmissionERCOT.geojson')
-merged_isone = gpd.read_file('data/mergedtransmissionISONE.geojson')
-merged_miso = gpd.read_file('data/mergedtransmissionMISO.geojson')
-merged_nyiso = gpd.read_file('data/mergedtransmissionNYISO.geojson')
-merged_pjm = gpd.read_file('data/mergedtransmissionPJM.geojson')
-merged_spp = gpd.read_file('data/mergedtransmissionSPP.geojson')
-merged_se = gpd.read_file('data/mergedtransmissionSE.geojson')
-
-regions = {
-    'CAISO': merged_caiso,
-    'ERCOT': merged_ercot,
-    'ISONE': merged_isone,
-    'MISO': merged_miso,
-    'NYISO': merged_nyiso,
-    'PJM': merged_pjm,
-    'SPP': merged_spp,
-    'SE': merged_se
-}
-
-# %% Load Region Geometries
-caiso_geometry = gpd.read_file('data/caisogeometry.geojson')
-ercot_geometry = gpd.read_file('data/ercotgeometry.geojson')
-isone_geometry = gpd.read_file('data/iso_negeometry.geojson')
-miso_geometry = gpd.read_file('data/misogeometry.geojson')
-nyiso_geometry = gpd.read_file('data/nyisogeometry.geojson')
-pjm_geometry = gpd.read_file('data/pjmgeometry.geojson')
-spp_geometry = gpd.read_file('data/sppgeometry.geojson')
-se_geometry = gpd.read_file('data/segeometry.geojson')
-
-region_geometries = {
-    'CAISO': caiso_geometry,
-    'ERCOT': ercot_geometry,
-    'ISONE': isone_geometry,
-    'MISO': miso_geometry,
-    'NYISO': nyiso_geometry,
-    'PJM': pjm_geometry,
-    'SPP': spp_geometry,
-    'SE': se_geometry
-}
+from IGDAL_PROJECT_REGIONS import load_registry, geometry_path, merged_path, coordstore_path
+from IGDAL_PROJECT_INTERFACES import apportion, apportion_store, share_matrix, region_frame
+from IGDAL_PROJECT_COORDSTORE import CoordStore
 
-# %% Fetch ACS Data
 acs_variables = {
     'Total_Population': 'B01003_001E',
     'Median_Age': 'B01002_001E',
@@ -65,55 +24,117 @@ acs_variables = {
     'Hispanic_Population': 'B03003_003E'
 }
 
-acs_data = censusdata.download(
-    src='acs5',
-    year=2019,
-    geo=censusdata.censusgeo([('state', '*'), ('county', '*')]),
-    var=list(acs_variables.values())
-)
 
-acs_data.columns = acs_variables.keys()
-acs_data = acs_data.reset_index()
+# %% Load Merged Transmission Data and Region Geometries
+def load_merged_lines(region):
+    # Prefer the memory-mapped coordinate store; fall back to the GeoJSON if the store is
+    # missing or older (e.g. merged lines rewritten by a tool that did not update it)
+    meta_path = os.path.join(coordstore_path(region), 'meta.json')
+    if os.path.exists(meta_path) and (
+        not os.path.exists(merged_path(region)) or os.path.getmtime(meta_path) >= os.path.getmtime(merged_path(region))
+    ):
+        return CoordStore(coordstore_path(region))
+    return gpd.read_file(merged_path(region))
+
+
+def line_attributes(transmission_data):
+    if isinstance(transmission_data, CoordStore):
+        return transmission_data.attributes
+    return transmission_data
+
+
+def line_shares(transmission_data, resolved_regions):
+    """
+    (lines x regions) share of every line's length inside each overlap-free region
+    (see IGDAL_PROJECT_INTERFACES), computed once per region file.
+    """
+    if isinstance(transmission_data, CoordStore):
+        pairs = apportion_store(transmission_data, resolved_regions)
+        return share_matrix(*pairs, len(transmission_data), resolved_regions)
+    line_geoms = transmission_data.to_crs(epsg=3857).geometry.values
+    return share_matrix(*apportion(line_geoms, resolved_regions), len(line_geoms), resolved_regions)
+
+
+def clip_lines_to_region(transmission_data, fraction):
+    """
+    Line attributes with length and capacity scaled to the line's share inside the region;
+    the share is kept in REGION_FRACTION.
+    """
+    attributes = line_attributes(transmission_data).copy()
+    for column in ['LINE_LENGTH_KM', 'LINE_LENGTH_MILES', 'POWER_CAPACITY']:
+        if column in attributes.columns:
+            attributes[column] = attributes[column] * fraction
+    attributes['REGION_FRACTION'] = fraction
+    return attributes
+
 
+def load_regions(registry):
+    regions = {region['key']: load_merged_lines(region) for region in registry}
+    region_geometries = {region['key']: gpd.read_file(geometry_path(region)) for region in registry}
+    return regions, region_geometries
+
+
+# %% Fetch ACS Data
 def extract_geoid(censusgeo):
     geos = censusgeo.geo
     state_fips = geos[0][1]
     county_fips = geos[1][1]
     return state_fips + county_fips
 
-acs_data['GEOID'] = acs_data['index'].apply(extract_geoid)
 
-# %% Get Geometry for Counties
-counties = gpd.read_file('data/US_COUNTY_SHPFILE/US_COUNTY_cont.shp')
-counties['GEOID'] = counties['STATE_FIPS'] + counties['CNTY_FIPS']
+def fetch_acs_data():
+    import censusdata
+
+    acs_data = censusdata.download(
+        src='acs5',
+        year=2019,
+        geo=censusdata.censusgeo([('state', '*'), ('county', '*')]),
+        var=list(acs_variables.values())
+    )
+
+    acs_data.columns = acs_variables.keys()
+    acs_data = acs_data.reset_index()
+    acs_data['GEOID'] = acs_data['index'].apply(extract_geoid)
+    return acs_data
+
 
-# Merge ACS data with county geometries
-acs_gdf = counties.merge(acs_data, on='GEOID')
+# %% Get Geometry for Counties, Process and Clean Data
+def build_acs_gdf(acs_data):
+    counties = gpd.read_file('data/US_COUNTY_SHPFILE/US_COUNTY_cont.shp')
+    counties['GEOID'] = counties['STATE_FIPS'] + counties['CNTY_FIPS']
 
-# %% Process and Clean Data
-acs_gdf = acs_gdf.dropna(subset=acs_variables.keys())
-acs_gdf = acs_gdf[acs_gdf['Total_Population'] > 0]
+    # Merge ACS data with county geometries
+    acs_gdf = counties.merge(acs_data, on='GEOID')
 
-acs_gdf['Percent_White'] = (acs_gdf['White_Population'] / acs_gdf['Total_Population']) * 100
-acs_gdf['Percent_Black'] = (acs_gdf['Black_Population'] / acs_gdf['Total_Population']) * 100
-acs_gdf['Percent_Asian'] = (acs_gdf['Asian_Population'] / acs_gdf['Total_Population']) * 100
-acs_gdf['Percent_Hispanic'] = (acs_gdf['Hispanic_Population'] / acs_gdf['Total_Population']) * 100
+    acs_gdf = acs_gdf.dropna(subset=acs_variables.keys())
+    acs_gdf = acs_gdf[acs_gdf['Total_Population'] > 0]
+
+    acs_gdf['Percent_White'] = (acs_gdf['White_Population'] / acs_gdf['Total_Population']) * 100
+    acs_gdf['Percent_Black'] = (acs_gdf['Black_Population'] / acs_gdf['Total_Population']) * 100
+    acs_gdf['Percent_Asian'] = (acs_gdf['Asian_Population'] / acs_gdf['Total_Population']) * 100
+    acs_gdf['Percent_Hispanic'] = (acs_gdf['Hispanic_Population'] / acs_gdf['Total_Population']) * 100
+
+    acs_gdf = acs_gdf[['GEOID', 'Total_Population', 'Median_Age', 'Median_Household_Income',
+                       'White_Population', 'Black_Population', 'Asian_Population', 'Hispanic_Population',
+                       'Percent_White', 'Percent_Black', 'Percent_Asian', 'Percent_Hispanic', 'geometry']]
+    return acs_gdf
 
-acs_gdf = acs_gdf[['GEOID', 'Total_Population', 'Median_Age', 'Median_Household_Income',
-                   'White_Population', 'Black_Population', 'Asian_Population', 'Hispanic_Population',
-                   'Percent_White', 'Percent_Black', 'Percent_Asian', 'Percent_Hispanic', 'geometry']]
 
 # %% Collect All Unique TYPES Across All Regions
-all_unique_types = set()
-for transmission_data in regions.values():
-    if 'TYPE' in transmission_data.columns:
-        all_unique_types.update(transmission_data['TYPE'].dropna().unique())
-all_unique_types = sorted(all_unique_types)
+def collect_unique_types(regions):
+    all_unique_types = set()
+    for transmission_data in regions.values():
+        transmission_data = line_attributes(transmission_data)
+        if 'TYPE' in transmission_data.columns:
+            all_unique_types.update(transmission_data['TYPE'].dropna().unique())
+    return sorted(all_unique_types)
+
 
 # %% Define summarize_region Function
-def summarize_region(region_name, region_geometry, transmission_data, acs_gdf, all_unique_types):
+def summarize_region(region_name, region_geometry, transmission_data, acs_gdf, all_unique_types, fraction):
+    # Count only the share of border-crossing lines inside this region, so region totals add up
+    transmission_data = clip_lines_to_region(transmission_data, fraction)
     region_geometry = region_geometry.to_crs(acs_gdf.crs)
-    transmission_data = transmission_data.to_crs(acs_gdf.crs)
     counties_in_region = gpd.sjoin(acs_gdf, region_geometry, how='inner', op='intersects')
 
     if counties_in_region.empty:
@@ -134,8 +155,9 @@ def summarize_region(region_name, region_geometry, transmission_data, acs_gdf, a
     total_line_length_mi = transmission_data['LINE_LENGTH_MILES'].sum() if 'LINE_LENGTH_MILES' in transmission_data.columns else np.nan
 
     if 'TYPE' in transmission_data.columns:
-        type_counts = transmission_data['TYPE'].value_counts()
-        type_counts_dict = {t: int(type_counts.get(t, 0)) for t in all_unique_types}
+        # Lines shared with other regions count by their share inside this one
+        type_counts = transmission_data.groupby('TYPE')['REGION_FRACTION'].sum()
+        type_counts_dict = {t: float(type_counts.get(t, 0)) for t in all_unique_types}
     else:
         type_counts_dict = {t: 0 for t in all_unique_types}
 
@@ -154,55 +176,86 @@ def summarize_region(region_name, region_geometry, transmission_data, acs_gdf, a
     region_summary.update(type_counts_dict)
     return region_summary
 
-# %% Summarize Each Region
-region_summaries = []
-for region_name in regions.keys():
-    transmission_data = regions[region_name]
-    region_geometry = region_geometries[region_name]
-    summary = summarize_region(region_name, region_geometry, transmission_data, acs_gdf, all_unique_types)
-    region_summaries.append(summary)
-
-summary_df = pd.DataFrame(region_summaries)
-summary_df.fillna(0, inplace=True)
-print(summary_df)
-
-# %% Standardize Data
-numeric_columns = summary_df.select_dtypes(include=np.number).columns
-scaler = StandardScaler()
-standardized_data = scaler.fit_transform(summary_df[numeric_columns])
-standardized_df = pd.DataFrame(standardized_data, columns=numeric_columns)
-
-# %% Hierarchical Clustering
-linkage_matrix = linkage(standardized_data, method='ward')
-
-plt.figure(figsize=(10, 7))
-plt.title("Dendrogram for Hierarchical Clustering")
-dendrogram(linkage_matrix, labels=summary_df['Region'].values, leaf_rotation=90, leaf_font_size=10)
-plt.xlabel('Regions')
-plt.ylabel('Distance')
-plt.savefig('dendrogram.png', dpi=1200)
-plt.show()
-
-# %% Correlation Matrix Heatmap
-correlation_matrix = summary_df[numeric_columns].corr()
-
-plt.figure(figsize=(12, 10))
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5)
-plt.title('Correlation Matrix Heatmap')
-plt.xticks(rotation=45)
-plt.yticks(rotation=0)
-plt.tight_layout()
-plt.savefig('correlation_heatmap.png', dpi=1200)
-plt.show()
-
-# %% Clustered Heatmap of Regions
-standardized_df['Region'] = summary_df['Region']
-standardized_df.set_index('Region', inplace=True)
-
-sns.clustermap(standardized_df, method='ward', cmap='coolwarm', figsize=(12, 10))
-plt.title('Clustered Heatmap of Regions')
-plt.savefig('clustered_heatmap.png', dpi=1200)
-plt.show()
-
-
-# %%
\ No newline at end of file
+
+# %% Standardize Data and Hierarchical Clustering
+def cluster_regions(summary_df):
+    from sklearn.preprocessing import StandardScaler
+    from scipy.cluster.hierarchy import linkage
+
+    numeric_columns = summary_df.select_dtypes(include=np.number).columns
+    scaler = StandardScaler()
+    standardized_data = scaler.fit_transform(summary_df[numeric_columns])
+    standardized_df = pd.DataFrame(standardized_data, columns=numeric_columns)
+
+    linkage_matrix = linkage(standardized_data, method='ward')
+    return numeric_columns, standardized_df, linkage_matrix
+
+
+# %% Dendrogram, Correlation Matrix Heatmap and Clustered Heatmap of Regions
+def plot_clusters(summary_df, numeric_columns, standardized_df, linkage_matrix):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from scipy.cluster.hierarchy import dendrogram
+
+    plt.figure(figsize=(10, 7))
+    plt.title("Dendrogram for Hierarchical Clustering")
+    dendrogram(linkage_matrix, labels=summary_df['Region'].values, leaf_rotation=90, leaf_font_size=10)
+    plt.xlabel('Regions')
+    plt.ylabel('Distance')
+    plt.savefig('dendrogram.png', dpi=1200)
+    plt.show()
+
+    correlation_matrix = summary_df[numeric_columns].corr()
+
+    plt.figure(figsize=(12, 10))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5)
+    plt.title('Correlation Matrix Heatmap')
+    plt.xticks(rotation=45)
+    plt.yticks(rotation=0)
+    plt.tight_layout()
+    plt.savefig('correlation_heatmap.png', dpi=1200)
+    plt.show()
+
+    standardized_df['Region'] = summary_df['Region']
+    standardized_df.set_index('Region', inplace=True)
+
+    sns.clustermap(standardized_df, method='ward', cmap='coolwarm', figsize=(12, 10))
+    plt.title('Clustered Heatmap of Regions')
+    plt.savefig('clustered_heatmap.png', dpi=1200)
+    plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize regions with ACS data and cluster them.')
+    parser.add_argument('--no-plots', action='store_true', help='skip the figures (matplotlib/seaborn are never imported)')
+    args = parser.parse_args(argv)
+
+    registry = load_registry()
+    regions, region_geometries = load_regions(registry)
+    acs_gdf = build_acs_gdf(fetch_acs_data())
+    all_unique_types = collect_unique_types(regions)
+    # Region polygons overlap; line totals use the overlap-free versions from INTERFACES
+    resolved_regions = region_frame(region_geometries)
+    region_column = {key: i for i, key in enumerate(resolved_regions['REGION'])}
+
+    # %% Summarize Each Region
+    region_summaries = []
+    for region_name in regions.keys():
+        transmission_data = regions[region_name]
+        region_geometry = region_geometries[region_name]
+        fraction = line_shares(transmission_data, resolved_regions)[:, region_column[region_name]]
+        summary = summarize_region(region_name, region_geometry, transmission_data, acs_gdf, all_unique_types, fraction)
+        region_summaries.append(summary)
+
+    summary_df = pd.DataFrame(region_summaries)
+    summary_df.fillna(0, inplace=True)
+    print(summary_df)
+
+    numeric_columns, standardized_df, linkage_matrix = cluster_regions(summary_df)
+    if not args.no_plots:
+        plot_clusters(summary_df, numeric_columns, standardized_df, linkage_matrix)
+
+
+# %%
+if __name__ == '__main__':
+    main()
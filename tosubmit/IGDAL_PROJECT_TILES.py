@@ -0,0 +1,162 @@
+# This script exports the FERC 1000 regions, their borders and the merged transmission lines as a
+# tile pyramid for an offline, interactive map, instead of the static 300-dpi national plots from
+# TASK1/TASK3.
+#
+# For every zoom level the layers are simplified once with a tolerance of a fraction of a pixel
+# at that zoom, clipped to Web Mercator 256px tiles and quantized to a 4096 tile extent. Each
+# tile is written as a small JavaScript file so the viewer (tiles/index.html) can load only the
+# visible tiles with <script> tags straight from disk, with no web server or network access.
+#
+# Usage: python IGDAL_PROJECT_TILES.py --min-zoom 3 --max-zoom 10
+
+import argparse
+import json
+import os
+import shutil
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import mapping
+from IGDAL_PROJECT_REGIONS import load_registry, merged_path
+
+WORLD = 20037508.342789244  # half the Web Mercator extent in meters
+TILE_SIZE = 256
+EXTENT = 4096
+
+
+def load_layers(registry):
+    regions = gpd.read_file('data/FERC_1000_Regions.geojson').to_crs(epsg=3857)
+    regions['REGION'] = regions['FERC_1000 Regions'].map({region['name']: region['key'] for region in registry})
+    regions = regions.dropna(subset=['REGION'])[['REGION', 'geometry']]
+
+    line_frames = []
+    for region in registry:
+        path = merged_path(region)
+        if not os.path.exists(path):
+            print(f'{path} not found, skipping')
+            continue
+        merged = gpd.read_file(path).to_crs(epsg=3857)
+        merged['REGION'] = region['key']
+        line_frames.append(merged[['REGION', 'OWNER', 'VOLTAGE', 'TYPE', 'POWER_CAPACITY', 'geometry']])
+    lines = gpd.GeoDataFrame(pd.concat(line_frames, ignore_index=True), crs='EPSG:3857')
+
+    # Borders are a line layer of their own: stroking the per-tile clipped polygons would
+    # also draw the tile edges
+    borders = gpd.GeoDataFrame({'REGION': regions['REGION']}, geometry=regions.boundary, crs='EPSG:3857')
+
+    return {'regions': regions, 'borders': borders, 'lines': lines}
+
+
+def tile_size_m(z):
+    return 2 * WORLD / 2 ** z
+
+
+def tile_boxes(z, bounds):
+    """
+    All tiles at zoom z covering bounds, as (xs, ys, shapely boxes).
+    """
+    size = tile_size_m(z)
+    n = 2 ** z
+    x0 = max(int((bounds[0] + WORLD) // size), 0)
+    x1 = min(int((bounds[2] + WORLD) // size), n - 1)
+    y0 = max(int((WORLD - bounds[3]) // size), 0)
+    y1 = min(int((WORLD - bounds[1]) // size), n - 1)
+    xs, ys = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1))
+    xs, ys = xs.ravel(), ys.ravel()
+    minx = -WORLD + xs * size
+    maxy = WORLD - ys * size
+    return xs, ys, shapely.box(minx, maxy - size, minx + size, maxy)
+
+
+def quantize(geom, minx, maxy, size):
+    # Tile-local integer coordinates, y pointing down like the canvas
+    scale = EXTENT / size
+    return shapely.transform(geom, lambda c: np.rint((c - [minx, maxy]) * [scale, -scale]))
+
+
+def export_layer(name, gdf, z, out_dir, tolerance_px):
+    size = tile_size_m(z)
+    tolerance = tolerance_px * size / TILE_SIZE
+    # Regions and their borders keep their topology so borders stay closed, lines can collapse freely
+    simplified = gdf.geometry.simplify(tolerance, preserve_topology=(name != 'lines')).values
+    keep = ~shapely.is_empty(simplified)
+    records = [
+        {k: (None if pd.isnull(v) else v) for k, v in record.items()}
+        for record in gdf.drop(columns='geometry')[keep].to_dict('records')
+    ]
+    simplified = np.asarray(simplified[keep])
+
+    xs, ys, boxes = tile_boxes(z, gdf.total_bounds)
+    tree = shapely.STRtree(simplified)
+    tile_idx, geom_idx = tree.query(boxes, predicate='intersects')
+
+    # Group the (tile, geometry) pairs by tile with one sort
+    order = np.argsort(tile_idx, kind='stable')
+    tile_idx, geom_idx = tile_idx[order], geom_idx[order]
+    tile_ids, starts = np.unique(tile_idx, return_index=True)
+
+    written = 0
+    for t, members in zip(tile_ids, np.split(geom_idx, starts[1:])):
+        x, y = int(xs[t]), int(ys[t])
+        minx, miny, maxx, maxy = shapely.bounds(boxes[t])
+        clipped = shapely.clip_by_rect(simplified[members], minx, miny, maxx, maxy)
+        features = []
+        for member, geom in zip(members, clipped):
+            if geom.is_empty:
+                continue
+            features.append({
+                'type': 'Feature',
+                'properties': records[member],
+                'geometry': mapping(quantize(geom, minx, maxy, size))
+            })
+        if not features:
+            continue
+        tile_dir = os.path.join(out_dir, name, str(z), str(x))
+        os.makedirs(tile_dir, exist_ok=True)
+        with open(os.path.join(tile_dir, f'{y}.js'), 'w') as f:
+            payload = json.dumps(features, separators=(',', ':'), default=float)
+            f.write(f'addTile("{name}/{z}/{x}/{y}",{payload});\n')
+        written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export regions and merged lines as an offline tile pyramid.')
+    parser.add_argument('--min-zoom', type=int, default=3)
+    parser.add_argument('--max-zoom', type=int, default=10)
+    parser.add_argument('--tolerance-px', type=float, default=0.5, help='simplification tolerance in screen pixels')
+    parser.add_argument('--out', default='tiles', help='output directory')
+    args = parser.parse_args(argv)
+
+    registry = load_registry()
+    layers = load_layers(registry)
+    if os.path.exists(args.out):
+        shutil.rmtree(args.out)
+    os.makedirs(args.out)
+
+    for z in range(args.min_zoom, args.max_zoom + 1):
+        for name, gdf in layers.items():
+            written = export_layer(name, gdf, z, args.out, args.tolerance_px)
+            print(f'zoom {z}: {written} {name} tiles')
+
+    bounds = layers['regions'].to_crs(epsg=4326).total_bounds
+    meta = {
+        'minzoom': args.min_zoom,
+        'maxzoom': args.max_zoom,
+        'tileSize': TILE_SIZE,
+        'extent': EXTENT,
+        'bounds': [float(b) for b in bounds],
+        'layers': list(layers.keys()),
+        'colors': {region['key']: region['color'] for region in registry},
+        'labels': {region['key']: region['label'] for region in registry}
+    }
+    with open(os.path.join(args.out, 'meta.js'), 'w') as f:
+        f.write(f'var TILE_META = {json.dumps(meta)};\n')
+    shutil.copy('viewer/index.html', os.path.join(args.out, 'index.html'))
+    print(f'Open {os.path.join(args.out, "index.html")} in a browser')
+
+
+if __name__ == '__main__':
+    main()